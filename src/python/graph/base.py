@@ -1,12 +1,83 @@
 #!/usr/bin/env python3
 
 import random
+import struct
+import operator
 import collections
 import functools
+import itertools
 from typing import List
+from multiprocessing import shared_memory
+
+
+def _typed_buffer(fmt, n):
+    """Allocate zero-filled typed buffer of `n` items."""
+    return memoryview(bytearray(n * struct.calcsize(fmt))).cast(fmt)
+
+
+def _typed_values(fmt, values):
+    """Allocate typed buffer holding the values."""
+    buf = _typed_buffer(fmt, len(values))
+    for i, val in enumerate(values):
+        buf[i] = val
+    return buf
+
+
+# typed arrays attached to shared memory in each worker process
+_shared = {}
+
+
+def _share(arrays, shms):
+    """Copy typed arrays to shared memory.
+
+    Each array in the dict is replaced by a view of its shared memory,
+    so that updates are visible to worker processes.
+    Created shared memory is appended to `shms` as soon as it is created,
+    which is to be released by `_release_shared` even on error.
+
+    Returns:
+        blocks: list of tuple
+            argument of `_attach_shared` in worker processes
+    """
+    blocks = []
+    for name, arr in arrays.items():
+        data = arr.cast('B')
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        shm.buf[:len(data)] = data
+        shms.append(shm)
+        blocks.append((name, shm.name, arr.format, len(data)))
+        arrays[name] = shm.buf[:len(data)].cast(arr.format)
+    return blocks
+
+
+def _attach_shared(blocks, values=None):
+    """Attach arrays shared by `_share` to `_shared` in worker process."""
+    for name, shm_name, fmt, nbytes in blocks:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _shared[name] = shm.buf[:nbytes].cast(fmt)
+        _shared[name + '_shm'] = shm
+    _shared.update(values or {})
+
+
+def _release_shared(shms, arrays):
+    """Release views in arrays, then close and unlink shared memory."""
+    arrays.clear()
+    for shm in shms:
+        shm.close()
+        shm.unlink()
 
 
 class Node(object):
+    """Binary tree node.
+
+    Iteration yields values in the order set by `set_order_type`,
+    which is done with an explicit stack, hence deep trees
+    do not hit the recursion limit and each value is yielded in O(1).
+    """
+    __slots__ = ('_left', '_right', '_val', '_order_type')
+
+    _ORDERS = ('in', 'pre', 'post', 'level')
+
     def __init__(self, val, order='in'):
         self._left = None
         self._right = None
@@ -17,43 +88,118 @@ class Node(object):
     def left(self):
         return self._left
 
+    @left.setter
+    def left(self, node):
+        self._left = node
+
     @property
     def right(self):
         return self._right
 
+    @right.setter
+    def right(self, node):
+        self._right = node
+
     @property
     def val(self):
         return self._val
 
     def set_order_type(self, order='in') -> None:
-        if order not in ('in', 'pre'):
-            raise ValueError('Order type must be chosen from (`in`, `pre`)')
+        if order not in self._ORDERS:
+            raise ValueError('Order type must be chosen from (`in`, `pre`, `post`, `level`)')
 
         self._order_type = order
 
     def __iter__(self):
-        if self._order_type == 'in':
-            yield from self._inorder(self)
-        elif self._order_type == 'pre':
-            yield from self._preorder(self)
-
-    def _inorder(self, node):
-        if node.left is not None:
-            yield from self._inorder(node.left)
-
-        yield node.val
-
-        if node.right is not None:
-            yield from self._inorder(node.right)
+        return self.traverse()
 
-    def _preorder(self, node):
-        yield node.val
+    def traverse(self, order: str = None, constant_memory: bool = False):
+        """Iterate over values in the tree.
 
-        if node.left is not None:
-            yield from self._preorder(node.left)
-
-        if node.right is not None:
-            yield from self._preorder(node.right)
+        Args:
+            order: str
+                'in', 'pre', 'post' or 'level' (default: the order type set)
+            constant_memory: bool
+                use Morris traversal, which takes O(1) memory
+                by threading the tree temporarily.
+                Only 'in' and 'pre' are supported,
+                and the tree must not be modified during iteration.
+
+        Yields:
+            val: value of each node
+        """
+        order = order or self._order_type
+        if order not in self._ORDERS:
+            raise ValueError('Order type must be chosen from (`in`, `pre`, `post`, `level`)')
+
+        if constant_memory:
+            # search module imports this module
+            from graph.search import morris_inorder, morris_preorder
+            if order == 'in':
+                return morris_inorder(self)
+            if order == 'pre':
+                return morris_preorder(self)
+            raise ValueError('constant_memory is supported only in `in` and `pre` order')
+
+        return {
+            'in': self._inorder,
+            'pre': self._preorder,
+            'post': self._postorder,
+            'level': self._levelorder,
+        }[order](self)
+
+    @staticmethod
+    def _inorder(node):
+        stack = []
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+
+            node = stack.pop()
+            yield node.val
+            node = node.right
+
+    @staticmethod
+    def _preorder(node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield node.val
+
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+
+    @staticmethod
+    def _postorder(node):
+        stack = []
+        last = None
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+
+            top = stack[-1]
+            # visit right subtree before the node itself
+            if top.right is not None and top.right is not last:
+                node = top.right
+            else:
+                yield top.val
+                last = stack.pop()
+
+    @staticmethod
+    def _levelorder(node):
+        queue = collections.deque([node])
+        while queue:
+            node = queue.popleft()
+            yield node.val
+
+            if node.left is not None:
+                queue.append(node.left)
+            if node.right is not None:
+                queue.append(node.right)
 
     def print_inorder(self) -> None:
         """Print out all nodes inorder."""
@@ -132,6 +278,8 @@ class LinkedList(object):
 
 class LinkNode(object):
     """Linked List node."""
+    __slots__ = ('next', 'val')
+
     def __init__(self, val, next=None):
         self.next = next
         self.val = val
@@ -139,6 +287,8 @@ class LinkNode(object):
 
 class ExtLinkNode(object):
     """Doubly Linked List node."""
+    __slots__ = ('next', 'prev', 'val')
+
     def __init__(self, val, next=None, prev=None):
         self.next = next
         self.prev = prev
@@ -148,6 +298,8 @@ class ExtLinkNode(object):
 @functools.total_ordering
 class Edge(object):
     """Directed edge which is comparable by the weights."""
+    __slots__ = ('_u', '_v', 'w')
+
     def __init__(self, u: int, v: int, w: float):
         self._u = u
         self._v = v
@@ -161,6 +313,11 @@ class Edge(object):
     def v(self):
         return self._v
 
+    def oppose(self, u):
+        if u != self._u and u != self._v:
+            raise ValueError(f'edge does not have node: {u}')
+        return self._v if u == self._u else self._u
+
     def __str__(self):
         return f'Edge: {self._u} -> {self._v}: {self.w}'
 
@@ -173,6 +330,8 @@ class Edge(object):
 
 class UDEdge(Edge):
     """Undirected Edge object."""
+    __slots__ = ()
+
     def __init__(self, u: int, v: int, w: (int,float)):
         """Undirected edge.
 
@@ -188,59 +347,166 @@ class UDEdge(Edge):
             u, v = v, u
         super(UDEdge, self).__init__(u, v, w)
 
+    def __str__(self):
+        return f'Edge: {self.u:2d} <-> {self.v:2d}: {self.w:5.2f}'
+
+    def __repr__(self):
+        return f'UDEdge({self.u},{self.v},{self.w})'
+
+
+class EdgeTuple(collections.namedtuple('EdgeTuple', ['u', 'v', 'w'])):
+    """Lightweight directed edge.
+
+    Unlike Edge, this is compared as tuple of (u, v, w).
+    """
+    __slots__ = ()
+
     def oppose(self, u):
         if u != self.u and u != self.v:
             raise ValueError(f'edge does not have node: {u}')
         return self.v if u == self.u else self.u
 
-    def __str__(self):
-        return f'Edge: {self.u:2d} <-> {self.v:2d}: {self.w:5.2f}'
 
-    def __repr__(self):
-        return f'UDEdge({self.u},{self.v},{self.w})'
+class UDEdgeTuple(collections.namedtuple('UDEdgeTuple', ['u', 'v', 'w'])):
+    """Lightweight undirected edge.
+
+    Unlike UDEdge, this is compared as tuple of (u, v, w).
+    """
+    __slots__ = ()
+
+    def __new__(cls, u: int, v: int, w: (int, float)):
+        if u > v:
+            u, v = v, u
+        return super(UDEdgeTuple, cls).__new__(cls, u, v, w)
+
+    def oppose(self, u):
+        if u != self.u and u != self.v:
+            raise ValueError(f'edge does not have node: {u}')
+        return self.v if u == self.u else self.u
+
+
+_get_v = operator.attrgetter('v')
 
 
 class Graph(object):
     """Directed Graph."""
-    def __init__(self, n):
+    _edge_types = (Edge, EdgeTuple)
+
+    def __init__(self, n, tuple_edges=False):
+        """Graph with n vertices.
+
+        Args:
+            n: int
+                number of vertices
+            tuple_edges: bool
+                store edges as named tuples instead of Edge objects,
+                of which fields are faster to read in hot loops
+        """
         self._vertices = n
         self._g = collections.defaultdict(list)
+        self._edge = self._edge_types[tuple_edges]
+        # number of stored edges
+        self._edges = 0
+        # incremented on every modification
+        self._version = 0
 
     @property
     def V(self):
         return self._vertices
 
+    @property
+    def E(self):
+        """Number of stored edges, undirected edges are counted twice
+        as in CSRGraph."""
+        return self._edges
+
     def _validate(self, n):
         if n < 0 or n > self._vertices:
             raise ValueError(f'Invalid vertex: {n}')
 
+    @property
+    def version(self):
+        """Counter which is incremented when the graph is modified."""
+        return self._version
+
+    @property
+    def directed(self):
+        return True
+
+    @property
+    def tuple_edges(self):
+        return self._edge is self._edge_types[True]
+
     def add_edge(self, u, v, w=0):
         self._validate(u)
         self._validate(v)
-        e = Edge(u, v, w)
+        e = self._edge(u, v, w)
         self._g[u].append(e)
+        self._edges += 1
+        self._version += 1
 
     def g(self, u):
         return self._g[u][:]
 
+    def iter_edges(self, u):
+        """Iterate over edges from u without copying.
+
+        This returns the iterator of the adjacency list, which runs in C.
+        Edges are only appended to the list, hence the iterator stays valid
+        while the graph is modified, and edges added to u are also yielded.
+        Use `version` to detect modification over a whole algorithm run.
+        """
+        return iter(self._g.get(u, ()))
+
+    def neighbors(self, u):
+        """Iterate over neighbor vertices of u without copying edges."""
+        return map(_get_v, self._g.get(u, ()))
+
+    def degree(self, u):
+        """Number of edges from u."""
+        return len(self._g.get(u, ()))
+
     def print_edges(self):
         for s, vertices in self._g.items():
             for v in vertices:
                 print(v)
 
+    def freeze(self) -> 'CSRGraph':
+        """Return read-only graph in compressed sparse row format."""
+        return CSRGraph.from_graph(self)
+
+    def reverse(self) -> 'Graph':
+        """Return graph with all edges reversed."""
+        R = self.__class__(self._vertices, self.tuple_edges)
+        for u in list(self._g):
+            for e in self._g[u]:
+                R._g[e.v].append(R._edge(e.v, e.u, e.w))
+        R._edges = self._edges
+        return R
+
 
 class UDGraph(Graph):
     """Undirected Graph."""
-    def __init__(self, n):
-        self._vertices = n
-        self._g = collections.defaultdict(list)
+    _edge_types = (UDEdge, UDEdgeTuple)
+
+    @property
+    def directed(self):
+        return False
+
+    def reverse(self) -> 'UDGraph':
+        return self
 
     def add_edge(self, u, v, w=0):
         self._validate(u)
         self._validate(v)
-        e = UDEdge(u, v, w)
+        e = self._edge(u, v, w)
         self._g[e.u].append(e)
         self._g[e.v].append(e)
+        self._edges += 2
+        self._version += 1
+
+    def neighbors(self, u):
+        return map(operator.methodcaller('oppose', u), self._g.get(u, ()))
 
     def print_edges(self):
         for u in range(self._vertices):
@@ -249,6 +515,162 @@ class UDGraph(Graph):
                     print(e)
 
 
+class CSRGraph(object):
+    """Read-only graph in compressed sparse row (CSR) format.
+
+    Neighbors of vertex u are indices[indptr[u]:indptr[u+1]]
+    and the weights are stored in the same positions of weights.
+    Arrays are typed memoryviews, which can be used by numpy without copy.
+
+    This has the same `V` and `g(u)` interface as Graph,
+    where edge objects are created on each call.
+    For undirected graph, each edge is stored in both directions.
+
+    Usage:
+        >>> G = UDGraph(3)
+        >>> G.add_edge(0, 1, 2)
+        >>> G.add_edge(1, 2, 3)
+        >>> C = G.freeze()
+        >>> list(C.neighbors(1))
+        [0, 2]
+    """
+    def __init__(self, n, indptr, indices, weights, directed=True, tuple_edges=False):
+        """Graph from CSR arrays.
+
+        Args:
+            n: int
+                number of vertices
+            indptr: sequence of int
+                start positions of each vertex, length is rows + 1
+            indices: sequence of int
+                target vertices
+            weights: sequence of int or float
+                edge weights
+            directed: bool
+                if False, `g(u)` returns UDEdge
+            tuple_edges: bool
+                return lightweight named tuples instead of Edge objects
+        """
+        if len(indices) != len(weights) or indptr[-1] != len(indices):
+            raise ValueError('Inconsistent size of CSR arrays')
+
+        self._vertices = n
+        self._indptr = indptr
+        self._indices = indices
+        self._weights = weights
+        self._directed = directed
+        self._edge = (UDGraph, Graph)[directed]._edge_types[tuple_edges]
+
+    @classmethod
+    def from_graph(cls, G: Graph) -> 'CSRGraph':
+        top = max((max(e.u, e.v) for edges in G._g.values() for e in edges), default=-1)
+        rows = max(G.V, top + 1)
+        directed = not isinstance(G, UDGraph)
+
+        indptr = _typed_buffer('q', rows + 1)
+        for u in range(rows):
+            indptr[u+1] = indptr[u] + len(G._g.get(u, ()))
+
+        size = indptr[rows]
+        indices = _typed_buffer('i' if rows < 1 << 31 else 'q', size)
+        is_int = all(type(e.w) is int for edges in G._g.values() for e in edges)
+        weights = _typed_buffer('q' if is_int else 'd', size)
+
+        for u, edges in G._g.items():
+            i = indptr[u]
+            for e in edges:
+                indices[i] = e.v if directed else e.oppose(u)
+                weights[i] = e.w
+                i += 1
+
+        return cls(G.V, indptr, indices, weights, directed, G.tuple_edges)
+
+    @property
+    def V(self):
+        return self._vertices
+
+    @property
+    def E(self):
+        """Number of stored edges, undirected edges are counted twice."""
+        return len(self._indices)
+
+    @property
+    def directed(self):
+        return self._directed
+
+    @property
+    def indptr(self):
+        return self._indptr
+
+    @property
+    def indices(self):
+        return self._indices
+
+    @property
+    def weights(self):
+        return self._weights
+
+    def _row(self, u):
+        if u < 0 or u >= len(self._indptr) - 1:
+            return 0, 0
+        return self._indptr[u], self._indptr[u+1]
+
+    def neighbors(self, u):
+        """Return neighbor vertices of u as read-only view without copy."""
+        st, end = self._row(u)
+        return self._indices[st:end].toreadonly()
+
+    def degree(self, u):
+        """Number of edges from u."""
+        st, end = self._row(u)
+        return end - st
+
+    def neighbor_weights(self, u):
+        """Return weights of edges from u as read-only view without copy."""
+        st, end = self._row(u)
+        return self._weights[st:end].toreadonly()
+
+    def g(self, u):
+        return list(self.iter_edges(u))
+
+    def reverse(self) -> 'CSRGraph':
+        """Return graph with all edges reversed."""
+        if not self._directed:
+            return self
+
+        rows = len(self._indptr) - 1
+        indptr = _typed_buffer('q', rows + 1)
+        for v in self._indices:
+            indptr[v+1] += 1
+        for u in range(rows):
+            indptr[u+1] += indptr[u]
+
+        pos = indptr.tolist()
+        indices = _typed_buffer(self._indices.format, len(self._indices))
+        weights = _typed_buffer(self._weights.format, len(self._weights))
+        for u in range(rows):
+            for i in range(self._indptr[u], self._indptr[u+1]):
+                v = self._indices[i]
+                indices[pos[v]] = u
+                weights[pos[v]] = self._weights[i]
+                pos[v] += 1
+
+        return CSRGraph(self._vertices, indptr, indices, weights,
+                        True, self._edge is EdgeTuple)
+
+    def iter_edges(self, u):
+        """Iterate over edges from u, which are created on the fly."""
+        st, end = self._row(u)
+        return map(self._edge, itertools.repeat(u, end - st),
+                   self._indices[st:end], self._weights[st:end])
+
+    def print_edges(self):
+        for u in range(len(self._indptr) - 1):
+            for e in self.g(u):
+                if self._directed or e.u == u:
+                    print(e)
+
+
 def generate_random_nodes(n=10, shuffle=False, random_split=False):
     vertices = list(range(1, n+1))
 
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 
+import itertools
+
 from graph.base import Node
 
 
@@ -7,9 +9,13 @@ RED = True
 
 
 class RBNode(Node):
+    __slots__ = ('color', 'count', '_size')
+
     def __init__(self, val, order='in'):
         super(RBNode, self).__init__(val, order)
         self.color = RED
+        # multiplicity of the value
+        self.count = 1
         self._size = 1
 
     @property
@@ -19,12 +25,12 @@ class RBNode(Node):
     def set_left(self, node: 'RBNode') -> None:
         if node is not None:
             self._left = node
-            self._size = node.size + self._get_size(node.right) + 1
+            self._size = node.size + self._get_size(node.right) + self.count
 
     def set_right(self, node: 'RBNode') -> None:
         if node is not None:
             self._right = node
-            self._size = node.size + self._get_size(node.left) + 1
+            self._size = node.size + self._get_size(node.left) + self.count
 
     @staticmethod
     def _get_size(node):
@@ -34,13 +40,56 @@ class RBNode(Node):
 
 
 class RBTree(object):
-    """Red-Black Tree."""
-    def __init__(self):
+    """Left-leaning Red-Black Tree.
+
+    This works as an ordered set by default, adding an existing value is skipped.
+    With `multiset`, each node keeps the multiplicity of its value instead,
+    and sizes, order statistics, ranges and deletion count every copy.
+    Each node keeps the size of its subtree,
+    hence order statistics and range counts take O(log n) time.
+
+    Usage:
+        >>> tree = RBTree.from_array([5, 1, 4, 2, 3])
+        >>> tree.rank(4)
+        3
+        >>> tree.select(0)
+        1
+        >>> tree.count_range(2, 4)
+        3
+        >>> list(tree.range(2, 4))
+        [2, 3, 4]
+        >>> tree.delete(3)
+        True
+        >>> tree.floor(3), tree.ceiling(3)
+        (2, 4)
+
+        >>> bag = RBTree.from_array([2, 1, 2, 3, 2], multiset=True)
+        >>> len(bag), bag.count(2), bag.rank(3), bag.select(3)
+        (5, 3, 4, 2)
+        >>> bag.delete(2)
+        True
+        >>> list(bag.range(1, 2))
+        [1, 2, 2]
+    """
+    def __init__(self, multiset: bool = False):
+        """Red-black tree.
+
+        Args:
+            multiset: bool
+                keep duplicated values instead of skipping them
+        """
         self.root = None
+        self.multiset = multiset
 
     @property
     def size(self):
-        return self.root.size
+        return RBNode._get_size(self.root)
+
+    def __len__(self):
+        return RBNode._get_size(self.root)
+
+    def __contains__(self, val):
+        return self.find(val)
 
     def rotate_left(self, node: RBNode) -> RBNode:
         head = node.right
@@ -49,7 +98,7 @@ class RBTree(object):
         head.color = head.left.color
         head._left.color = RED
         head._size = node._size
-        node._size = node._get_size(node.left) + node._get_size(node.right) + 1
+        node._size = node._get_size(node.left) + node._get_size(node.right) + node.count
         return head
 
     def rotate_right(self, node: RBNode) -> RBNode:
@@ -59,31 +108,27 @@ class RBTree(object):
         head.color = head.right.color
         head._right.color = RED
         head._size = node._size
-        node._size = node._get_size(node.left) + node._get_size(node.right) + 1
+        node._size = node._get_size(node.left) + node._get_size(node.right) + node.count
         return head
 
     def flip(self, node: RBNode) -> RBNode:
-        node.color ^= node.color
-        node.left.color ^= node.left.color
-        node.right.color ^= node.right.color
+        node.color = not node.color
+        node.left.color = not node.left.color
+        node.right.color = not node.right.color
         return node
 
     def __iter__(self):
-        yield from self.root._inorder(self.root)
-
-    def _add_node(self, node, val):
-        if node is None:
-            return RBNode(val)
-
-        # skip if already the node exists
-        if node.val == val:
-            return node
-
-        if node.val < val:
-            node._right = self._add_node(node.right, val)
-        elif node.val > val:
-            node._left = self._add_node(node.left, val)
-
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield from itertools.repeat(node.val, node.count)
+            node = node.right
+
+    def _balance(self, node):
         if self._is_red(node.right) and not self._is_red(node.left):
             node = self.rotate_left(node)
         if self._is_red(node.left) and self._is_red(node.left.left):
@@ -91,14 +136,26 @@ class RBTree(object):
         if self._is_red(node.left) and self._is_red(node.right):
             node = self.flip(node)
 
-        node._size = RBNode._get_size(node.left) + RBNode._get_size(node.right) + 1
+        node._size = RBNode._get_size(node.left) + RBNode._get_size(node.right) + node.count
+
+        return node
 
+    def _rebuild(self, path, node):
+        """Link node to parents in path from bottom and balance each of them."""
+        while path:
+            parent, left = path.pop()
+            if left:
+                parent._left = node
+            else:
+                parent._right = node
+            node = self._balance(parent)
         return node
 
     def add_node(self, val: int) -> None:
         """Add node with given value.
 
-        If the node already exists, skip the operation.
+        If the node already exists, skip the operation,
+        or increment its multiplicity if the tree is a multiset.
 
         Args:
             val: int
@@ -107,7 +164,41 @@ class RBTree(object):
         Returns:
             None
         """
-        self.root = self._add_node(self.root, val)
+        # nodes on the way and whether it went left
+        path = []
+        node = self.root
+
+        while node is not None:
+            if node.val == val:
+                # skip if already the node exists
+                if not self.multiset:
+                    return
+                for parent, _ in path:
+                    parent._size += 1
+                node.count += 1
+                node._size += 1
+                return
+            left = val < node.val
+            path.append((node, left))
+            node = node.left if left else node.right
+
+        for parent, _ in path:
+            parent._size += 1
+
+        node = RBNode(val)
+        while path:
+            parent, left = path.pop()
+            if left:
+                parent._left = node
+            else:
+                parent._right = node
+            # black child does not break the balance of the parent,
+            # hence the rest of the path is unchanged
+            if not node.color:
+                return
+            node = self._balance(parent)
+
+        self.root = node
         self.root.color = not RED
 
     def _is_red(self, node):
@@ -115,15 +206,13 @@ class RBTree(object):
             return False
         return node.color
 
-    def _find(self, node, val):
-        if node is None:
-            return False
-        if node.val == val:
-            return True
-        if node.val > val:
-            return self._find(node.left, val)
-        else:
-            return self._find(node.right, val)
+    def _find_node(self, val):
+        node = self.root
+        while node is not None:
+            if node.val == val:
+                return node
+            node = node.left if val < node.val else node.right
+        return None
 
     def find(self, val: int) -> bool:
         """Find value in Red-black tree.
@@ -135,14 +224,235 @@ class RBTree(object):
         Returns:
             bool: True if exists, False otherwise.
         """
-        return self._find(self.root, val)
+        return self._find_node(val) is not None
+
+    def count(self, val: int) -> int:
+        """Number of copies of the value, which is at most 1 unless multiset."""
+        node = self._find_node(val)
+        return 0 if node is None else node.count
+
+    def _move_red_left(self, node):
+        """Make left child or its left child red, assuming node is red."""
+        self.flip(node)
+        if self._is_red(node.right.left):
+            node._right = self.rotate_right(node.right)
+            node = self.rotate_left(node)
+            self.flip(node)
+        return node
+
+    def _move_red_right(self, node):
+        """Make right child or its child red, assuming node is red."""
+        self.flip(node)
+        if self._is_red(node.left.left):
+            node = self.rotate_right(node)
+            self.flip(node)
+        return node
+
+    def _delete_min(self, node):
+        path = []
+        while node.left is not None:
+            if not self._is_red(node.left) and not self._is_red(node.left.left):
+                node = self._move_red_left(node)
+            path.append((node, True))
+            node = node.left
+
+        return self._rebuild(path, None)
+
+    def _delete(self, node, val):
+        path = []
+        while True:
+            if val < node.val:
+                if not self._is_red(node.left) and not self._is_red(node.left.left):
+                    node = self._move_red_left(node)
+                path.append((node, True))
+                node = node.left
+                continue
+
+            if self._is_red(node.left):
+                node = self.rotate_right(node)
+            if node.val == val and node.right is None:
+                node = None
+                break
+            if not self._is_red(node.right) and not self._is_red(node.right.left):
+                node = self._move_red_right(node)
+
+            if node.val == val:
+                # replace by the successor and delete it from right subtree
+                successor = node.right
+                while successor.left is not None:
+                    successor = successor.left
+                node._val = successor.val
+                node.count = successor.count
+                node._right = self._delete_min(node.right)
+                node = self._balance(node)
+                break
+
+            path.append((node, False))
+            node = node.right
+
+        return self._rebuild(path, node)
+
+    def _prepare_delete(self):
+        # root becomes red temporarily if both children are black
+        if not self._is_red(self.root.left) and not self._is_red(self.root.right):
+            self.root.color = RED
+
+    def _finish_delete(self):
+        if self.root is not None:
+            self.root.color = not RED
+
+    def _decrement(self, val):
+        """Remove a copy of the value if it has more than one."""
+        path = []
+        node = self.root
+        while node.val != val:
+            path.append(node)
+            node = node.left if val < node.val else node.right
+
+        if node.count == 1:
+            return False
+        for parent in path:
+            parent._size -= 1
+        node.count -= 1
+        node._size -= 1
+        return True
+
+    def delete_min(self):
+        """Remove and return the smallest value.
+
+        Exceptions:
+            IndexError: if the tree is empty
+        """
+        if self.root is None:
+            raise IndexError('delete from empty tree')
+
+        node = self.root
+        while node.left is not None:
+            node = node.left
+        val = node.val
+        if self._decrement(val):
+            return val
+
+        self._prepare_delete()
+        self.root = self._delete_min(self.root)
+        self._finish_delete()
+        return val
+
+    def delete(self, val: int) -> bool:
+        """Delete the target value, or a copy of it if multiset.
+
+        Returns:
+            bool: True if deleted, False if not exists.
+        """
+        if not self.find(val):
+            return False
+        if self._decrement(val):
+            return True
+
+        self._prepare_delete()
+        self.root = self._delete(self.root, val)
+        self._finish_delete()
+        return True
+
+    def rank(self, val: int) -> int:
+        """Number of values smaller than the value."""
+        rank = 0
+        node = self.root
+        while node is not None:
+            if val < node.val:
+                node = node.left
+            elif node.val < val:
+                rank += RBNode._get_size(node.left) + node.count
+                node = node.right
+            else:
+                return rank + RBNode._get_size(node.left)
+        return rank
+
+    def select(self, k: int):
+        """Return k-th smallest value (0-indexed),
+        that is, `select(rank(val)) == val` for value in the tree.
+
+        Exceptions:
+            IndexError: if k is out of range
+        """
+        if k < 0 or k >= self.__len__():
+            raise IndexError(f'k must be in range [0, {self.__len__()})')
+
+        node = self.root
+        while True:
+            left = RBNode._get_size(node.left)
+            if k < left:
+                node = node.left
+            elif k >= left + node.count:
+                k -= left + node.count
+                node = node.right
+            else:
+                return node.val
+
+    def count_range(self, lo: int, hi: int) -> int:
+        """Number of values in range [lo, hi]."""
+        if hi < lo:
+            return 0
+        return self.rank(hi) - self.rank(lo) + self.count(hi)
+
+    def range(self, lo: int, hi: int):
+        """Iterate over values in range [lo, hi] in ascending order.
+
+        Subtrees out of the range are not visited,
+        hence this takes O(log n + k) time for k values.
+        """
+        stack = []
+        node = self.root
+
+        while stack or node is not None:
+            while node is not None:
+                if node.val < lo:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+
+            if not stack:
+                return
+            node = stack.pop()
+            if hi < node.val:
+                return
+            yield from itertools.repeat(node.val, node.count)
+            node = node.right
+
+    def floor(self, val: int):
+        """Largest value not larger than the value, None if not exists."""
+        found = None
+        node = self.root
+        while node is not None:
+            if val < node.val:
+                node = node.left
+            elif node.val < val:
+                found = node.val
+                node = node.right
+            else:
+                return node.val
+        return found
+
+    def ceiling(self, val: int):
+        """Smallest value not smaller than the value, None if not exists."""
+        found = None
+        node = self.root
+        while node is not None:
+            if node.val < val:
+                node = node.right
+            elif val < node.val:
+                found = node.val
+                node = node.left
+            else:
+                return node.val
+        return found
 
     @classmethod
-    def from_array(cls, arr: list) -> 'RBTree':
+    def from_array(cls, arr: list, multiset: bool = False) -> 'RBTree':
         """Build tree from array."""
-        cls = cls()
-        cls.root = RBNode(arr[0])
-        for val in arr[1:]:
+        cls = cls(multiset)
+        for val in arr:
             cls.add_node(val)
 
         return cls
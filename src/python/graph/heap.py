@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+
+class IndexedHeap(object):
+    """Indexed d-ary min-heap keyed by vertex id in range [0, n).
+
+    Each vertex is stored at most once, and its key can be decreased,
+    hence the heap size stays O(V) in Dijkstra's and Prim's algorithms.
+
+    Usage:
+        >>> h = IndexedHeap(5)
+        >>> h.push(3, 10)
+        >>> h.push(1, 7)
+        >>> h.decrease_key(3, 2)
+        >>> h.pop_min()
+        (3, 2)
+        >>> 1 in h
+        True
+    """
+    def __init__(self, n: int, d: int = 2):
+        """Heap for vertices in range [0, n).
+
+        Args:
+            n: int
+                number of vertices
+            d: int
+                number of children of each node
+        """
+        if d < 2:
+            raise ValueError('d must be larger than 1')
+        self._d = d
+        self._heap = []
+        # position of each vertex in heap, -1 if not in heap
+        self._pos = [-1] * n
+        self._keys = [None] * n
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, v):
+        return self._pos[v] >= 0
+
+    def contains(self, v: int) -> bool:
+        return self._pos[v] >= 0
+
+    def key(self, v: int):
+        """Return current key of vertex in heap."""
+        if self._pos[v] < 0:
+            raise KeyError(f'vertex is not in heap: {v}')
+        return self._keys[v]
+
+    def _sift_up(self, i):
+        heap, pos, keys, d = self._heap, self._pos, self._keys, self._d
+        v = heap[i]
+        key = keys[v]
+
+        while i > 0:
+            parent = (i - 1) // d
+            p = heap[parent]
+            if not key < keys[p]:
+                break
+            heap[i] = p
+            pos[p] = i
+            i = parent
+
+        heap[i] = v
+        pos[v] = i
+
+    def _sift_down(self, i):
+        heap, pos, keys, d = self._heap, self._pos, self._keys, self._d
+        n = len(heap)
+        v = heap[i]
+        key = keys[v]
+
+        while True:
+            first = d * i + 1
+            if first >= n:
+                break
+
+            child = first
+            for c in range(first + 1, min(first + d, n)):
+                if keys[heap[c]] < keys[heap[child]]:
+                    child = c
+
+            if not keys[heap[child]] < key:
+                break
+            heap[i] = heap[child]
+            pos[heap[i]] = i
+            i = child
+
+        heap[i] = v
+        pos[v] = i
+
+    def push(self, v: int, key) -> None:
+        """Add vertex with key.
+
+        Exceptions:
+            ValueError: if the vertex is already in heap
+        """
+        if self._pos[v] >= 0:
+            raise ValueError(f'vertex is already in heap: {v}')
+        self._keys[v] = key
+        self._heap.append(v)
+        self._sift_up(len(self._heap) - 1)
+
+    def decrease_key(self, v: int, key) -> None:
+        """Decrease key of vertex in heap.
+
+        Exceptions:
+            KeyError: if the vertex is not in heap
+            ValueError: if the key is larger than current key
+        """
+        if self._pos[v] < 0:
+            raise KeyError(f'vertex is not in heap: {v}')
+        if self._keys[v] < key:
+            raise ValueError(f'key must not be larger than current key: {self._keys[v]}')
+        self._keys[v] = key
+        self._sift_up(self._pos[v])
+
+    def peek(self) -> (int, object):
+        """Return vertex with minimum key and the key without removing."""
+        if not self._heap:
+            raise IndexError('pop from empty heap')
+        v = self._heap[0]
+        return v, self._keys[v]
+
+    def pop_min(self) -> (int, object):
+        """Remove and return vertex with minimum key and the key."""
+        if not self._heap:
+            raise IndexError('pop from empty heap')
+
+        heap = self._heap
+        v = heap[0]
+        last = heap.pop()
+        self._pos[v] = -1
+
+        if heap:
+            heap[0] = last
+            self._sift_down(0)
+
+        return v, self._keys[v]
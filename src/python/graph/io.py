@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+#
+# Bulk loading of edge lists and binary graph snapshots.
+#
+# Snapshot layout (all sections are aligned to 8 bytes):
+#   header   magic, format version, flags, formats of vertex and weight,
+#            number of vertices, rows and stored edges
+#   indptr   int64 x (rows + 1)
+#   u        int32/int64 x edges, source of each edge
+#   v        int32/int64 x edges, target of each edge
+#   w        float64 (or int64) x edges
+# Edges are sorted by source, so that (indptr, v, w) is CSR format
+# and (u, v, w) is plain edge list.
+# Undirected edges are stored in both directions.
+
+import sys
+import mmap
+import struct
+import operator
+
+from graph.base import Graph, CSRGraph, _typed_buffer, _typed_values
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+
+SNAPSHOT_MAGIC = b'ALGG'
+SNAPSHOT_VERSION = 1
+_HEADER = '<4sHHcc2xqqq'
+
+_FLAG_DIRECTED = 1
+_FLAG_BIG_ENDIAN = 2
+
+# number of bytes of text to parse at once
+_CHUNK_SIZE = 1 << 22
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+class _Column(object):
+    """Growable typed buffer."""
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.data = bytearray()
+
+    def extend(self, values):
+        self.data += struct.pack(f'{len(values)}{self.fmt}', *values)
+
+    def to_float(self):
+        values = self.view()
+        self.fmt = 'd'
+        self.data = bytearray()
+        self.extend(values.tolist())
+
+    def view(self):
+        return memoryview(self.data).cast(self.fmt)
+
+
+def _build_csr(n, us, vs, ws, directed, tuple_edges=False):
+    """Build CSRGraph from edge arrays by counting sort on sources."""
+    if not directed:
+        us, vs = _concat(us, vs), _concat(vs, us)
+        ws = _concat(ws, ws)
+
+    m = len(us)
+    rows = max(n, max(us, default=-1) + 1, max(vs, default=-1) + 1)
+    index_fmt = 'i' if rows < 1 << 31 else 'q'
+
+    if _np is not None and m:
+        src = _np.frombuffer(us, dtype=_np.int64)
+        order = _np.argsort(src, kind='stable')
+        indptr = _np.zeros(rows + 1, dtype=_np.int64)
+        _np.cumsum(_np.bincount(src, minlength=rows), out=indptr[1:])
+        indices = _np.frombuffer(vs, dtype=_np.int64)[order].astype(_np.dtype(index_fmt))
+        weights = _np.frombuffer(ws, dtype=_np.dtype(ws.format))[order]
+        return CSRGraph(n, memoryview(indptr).cast('B').cast('q'),
+                        memoryview(indices).cast('B').cast(index_fmt),
+                        memoryview(weights).cast('B').cast(ws.format),
+                        directed, tuple_edges)
+
+    indptr = _typed_buffer('q', rows + 1)
+    for u in us:
+        indptr[u+1] += 1
+    for u in range(rows):
+        indptr[u+1] += indptr[u]
+
+    pos = indptr.tolist()
+    indices = _typed_buffer(index_fmt, m)
+    weights = _typed_buffer(ws.format, m)
+    for u, v, w in zip(us, vs, ws):
+        indices[pos[u]] = v
+        weights[pos[u]] = w
+        pos[u] += 1
+
+    return CSRGraph(n, indptr, indices, weights, directed, tuple_edges)
+
+
+def _concat(a, b):
+    return memoryview(bytes(a.cast('B')) + bytes(b.cast('B'))).cast(a.format)
+
+
+def _parse_chunk(text, delimiter, comment, default_weight):
+    """Parse lines into columns of vertices and weight tokens.
+
+    Exceptions:
+        ValueError: if a line does not have 2 or 3 columns
+    """
+    lines = text.splitlines()
+    if comment in text:
+        lines = [line for line in lines if not line.startswith(comment)]
+
+    split = operator.methodcaller('split', delimiter)
+    lengths = set(map(len, map(split, lines)))
+    if not lengths <= {2, 3}:
+        # skip blank lines
+        lines = [line for line in lines if line.strip()]
+        lengths = set(map(len, map(split, lines)))
+    if not lengths <= {2, 3}:
+        line = next(line for line in lines if len(split(line)) not in (2, 3))
+        raise ValueError(f'Line must have 2 or 3 columns: {line!r}')
+
+    if len(lengths) == 1:
+        # all lines have the same number of columns,
+        # then columns are taken by slicing the flat list of tokens
+        cols = lengths.pop()
+        text = '\n'.join(lines)
+        flat = text.replace('\n', delimiter).split(delimiter) if delimiter else text.split()
+        us = list(map(int, flat[0::cols]))
+        ws = flat[2::cols] if cols > 2 else [default_weight] * len(us)
+        return us, list(map(int, flat[1::cols])), ws
+
+    rows = list(map(split, lines))
+    return ([int(r[0]) for r in rows], [int(r[1]) for r in rows],
+            [r[2] if len(r) > 2 else default_weight for r in rows])
+
+
+def read_edges(path: str, n: int = None, directed: bool = True,
+               delimiter: str = None, comment: str = '#', header: bool = False,
+               default_weight=0, chunk_size: int = _CHUNK_SIZE) -> CSRGraph:
+    """Load edge list from text or CSV file without building edge objects.
+
+    Each line is `u v [w]` separated by `delimiter`.
+    Lines are parsed in chunks into typed buffers,
+    then sorted into CSR format at once,
+    hence no per-edge validation or object allocation happens.
+    Weights are int64 unless any weight is not an integer,
+    in which case all weights are float64.
+
+    Args:
+        path: str
+            path to the file
+        n: int
+            number of vertices (default: largest vertex + 1)
+        directed: bool
+            if False, each line is an undirected edge
+        delimiter: str
+            column separator (default: whitespace), e.g. ',' for CSV
+        comment: str
+            lines starting with this are skipped
+        header: bool
+            skip the first line
+        default_weight: int or float
+            weight of lines without weight column
+        chunk_size: int
+            approximate number of bytes to parse at once
+
+    Returns:
+        G: CSRGraph
+
+    Exceptions:
+        ValueError: if a line cannot be parsed, does not have 2 or 3 columns,
+            or has negative vertex
+    """
+    us, vs = _Column('q'), _Column('q')
+    ws = _Column('q' if type(default_weight) is int else 'd')
+
+    with open(path) as f:
+        if header:
+            f.readline()
+
+        while True:
+            text = f.read(chunk_size)
+            if not text:
+                break
+            # complete the last line
+            text += f.readline()
+
+            u_col, v_col, weights = _parse_chunk(text, delimiter, comment, default_weight)
+            us.extend(u_col)
+            vs.extend(v_col)
+
+            if ws.fmt == 'q':
+                try:
+                    weights = list(map(int, weights))
+                except ValueError:
+                    ws.to_float()
+            if ws.fmt == 'd':
+                weights = list(map(float, weights))
+            ws.extend(weights)
+
+    us, vs, ws = us.view(), vs.view(), ws.view()
+    if len(us) and min(min(us), min(vs)) < 0:
+        raise ValueError('Vertex must not be negative')
+
+    top = max(max(us, default=-1), max(vs, default=-1))
+    n = top + 1 if n is None else n
+    if top >= n:
+        raise ValueError(f'Invalid vertex: {top}')
+
+    return _build_csr(n, us, vs, ws, directed)
+
+
+def save_snapshot(G: Graph, path: str) -> None:
+    """Save graph to binary snapshot.
+
+    Args:
+        G: Graph, UDGraph or CSRGraph
+            graph object
+        path: str
+            path to the snapshot file
+    """
+    C = G if isinstance(G, CSRGraph) else G.freeze()
+    indptr, indices, weights = C.indptr, C.indices, C.weights
+    rows = len(indptr) - 1
+    m = len(indices)
+    index_fmt = 'i' if rows < 1 << 31 else 'q'
+
+    flags = (_FLAG_DIRECTED if C.directed else 0) | \
+        (_FLAG_BIG_ENDIAN if sys.byteorder == 'big' else 0)
+    header = struct.pack(_HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags,
+                         index_fmt.encode(), weights.format.encode(), C.V, rows, m)
+
+    us = _typed_buffer(index_fmt, m)
+    for u in range(rows):
+        for i in range(indptr[u], indptr[u+1]):
+            us[i] = u
+
+    sections = [
+        indptr if indptr.format == 'q' else _typed_values('q', indptr),
+        us,
+        indices if indices.format == index_fmt else _typed_values(index_fmt, indices),
+        weights,
+    ]
+
+    with open(path, 'wb') as f:
+        f.write(header)
+        offset = len(header)
+        for arr in sections:
+            f.write(b'\0' * (_align(offset) - offset))
+            data = arr.cast('B')
+            f.write(data)
+            offset = _align(offset) + len(data)
+
+
+def load_snapshot(path: str, mmap_mode: bool = True, tuple_edges: bool = False) -> CSRGraph:
+    """Load graph from binary snapshot.
+
+    With `mmap_mode`, the file is mapped read-only and arrays of the graph
+    are views of the mapping, hence loading takes constant time
+    and pages are read from disk on first access.
+
+    Args:
+        path: str
+            path to the snapshot file
+        mmap_mode: bool
+            map the file instead of reading it into memory
+        tuple_edges: bool
+            return lightweight named tuples from `iter_edges`
+
+    Returns:
+        G: CSRGraph
+            read-only graph
+
+    Exceptions:
+        ValueError: if the file is not a snapshot of supported version
+    """
+    with open(path, 'rb') as f:
+        if mmap_mode:
+            buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            buf = memoryview(f.read())
+
+    size = struct.calcsize(_HEADER)
+    if len(buf) < size:
+        raise ValueError('File is too small to be a snapshot')
+
+    magic, version, flags, index_fmt, weight_fmt, n, rows, m = \
+        struct.unpack_from(_HEADER, buf)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError('File is not a graph snapshot')
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f'Unsupported snapshot version: {version}')
+    if bool(flags & _FLAG_BIG_ENDIAN) != (sys.byteorder == 'big'):
+        raise ValueError('Snapshot was saved on machine with different byte order')
+
+    index_fmt, weight_fmt = index_fmt.decode(), weight_fmt.decode()
+    arrays = []
+    offset = size
+    for fmt, count in (('q', rows + 1), (index_fmt, m), (index_fmt, m), (weight_fmt, m)):
+        offset = _align(offset)
+        nbytes = count * struct.calcsize(fmt)
+        if offset + nbytes > len(buf):
+            raise ValueError('Snapshot is truncated')
+        arrays.append(buf[offset:offset+nbytes].cast(fmt))
+        offset += nbytes
+
+    indptr, _, indices, weights = arrays
+    return CSRGraph(n, indptr, indices, weights, bool(flags & _FLAG_DIRECTED), tuple_edges)
@@ -1,9 +1,123 @@
 #!/usr/bin/env python3
 
+import os
 import heapq
+import collections
+from concurrent.futures import ProcessPoolExecutor
 
+from graph.base import _typed_values, _shared, _share, _attach_shared, _release_shared
+from graph.heap import IndexedHeap
+from graph.unionfind import UF
+from graph.stats import _resolve
 
-def prims(s: int, G: 'UDGraph') -> list:
+
+# number of children of indexed heap
+_HEAP_ARITY = 4
+# minimum number of edges to run Boruvka's Algorithm on worker processes
+_PARALLEL_THRESHOLD = 1 << 16
+# minimum average degree to prefer Boruvka's Algorithm
+_DENSE_DEGREE = 8
+
+
+def _prims_indexed(s, G):
+    edges = [None] * G.V
+    visited = [False] * G.V
+    visited[s] = True
+
+    hq = IndexedHeap(G.V, _HEAP_ARITY)
+    v = s
+
+    while True:
+        for e in G.iter_edges(v):
+            u = e.oppose(v)
+            if visited[u]:
+                continue
+            if u not in hq:
+                hq.push(u, e.w)
+                edges[u] = e
+            elif e.w < hq.key(u):
+                hq.decrease_key(u, e.w)
+                edges[u] = e
+
+        if not hq:
+            break
+
+        v, _ = hq.pop_min()
+        visited[v] = True
+
+    return edges
+
+
+def _prims_stats(s, G, heap, stats):
+    """Instrumented `prims`."""
+    with stats.phase('init'):
+        edges = [None] * G.V
+        visited = [False] * G.V
+        visited[s] = True
+
+    with stats.phase('search'):
+        stats.vertices_settled += 1
+
+        if heap == 'indexed':
+            hq = IndexedHeap(G.V, _HEAP_ARITY)
+            v = s
+
+            while True:
+                for e in G.iter_edges(v):
+                    stats.edges_scanned += 1
+                    u = e.oppose(v)
+                    if visited[u]:
+                        continue
+                    if u not in hq:
+                        stats.relaxations += 1
+                        stats.heap_pushes += 1
+                        hq.push(u, e.w)
+                        edges[u] = e
+                    elif e.w < hq.key(u):
+                        stats.relaxations += 1
+                        stats.decrease_keys += 1
+                        hq.decrease_key(u, e.w)
+                        edges[u] = e
+
+                if not hq:
+                    break
+
+                v, _ = hq.pop_min()
+                stats.heap_pops += 1
+                stats.vertices_settled += 1
+                visited[v] = True
+        else:
+            hq = []
+
+            for e in G.iter_edges(s):
+                stats.edges_scanned += 1
+                stats.heap_pushes += 1
+                heapq.heappush(hq, (e.w, s, e))
+
+            while hq:
+                _, u, edge = heapq.heappop(hq)
+                stats.heap_pops += 1
+                v = edge.oppose(u)
+                if visited[v]:
+                    stats.stale_pops += 1
+                    continue
+
+                edges[v] = edge
+                visited[v] = True
+                stats.vertices_settled += 1
+
+                for e in G.iter_edges(v):
+                    stats.edges_scanned += 1
+                    if not visited[e.oppose(v)]:
+                        stats.relaxations += 1
+                        stats.heap_pushes += 1
+                        heapq.heappush(hq, (e.w, v, e))
+
+    stats._finish()
+    return edges
+
+
+def prims(s: int, G: 'UDGraph', heap: str = 'heapq', stats=None) -> list:
     """Minimum spanning tree by Prim's Algorithm.
 
     Args:
@@ -11,21 +125,35 @@ def prims(s: int, G: 'UDGraph') -> list:
             source node for Prim's Algorithm
         G: UDGraph
             undirected graph object
+        heap: str
+            'heapq': push an entry for every edge
+            'indexed': use IndexedHeap with decrease-key,
+                which keeps the heap size O(V) on dense graphs
+        stats: AlgorithmStats or function
+            if given, run instrumented code to count heap operations
+            and scanned edges, and time phases
     Returns:
         edges: list(UDEdge)
            list of edge object for connection
            if source, set as None
     """
+    if heap not in ('heapq', 'indexed'):
+        raise ValueError('heap must be chosen from (`heapq`, `indexed`)')
+    if stats is not None:
+        return _prims_stats(s, G, heap, _resolve(stats))
+    if heap == 'indexed':
+        return _prims_indexed(s, G)
+
     edges = [None] * G.V
     visited = {s}
 
     hq = []
 
-    for e in G.g(s):
-        heapq.heappush(hq, (e, s))
+    for e in G.iter_edges(s):
+        heapq.heappush(hq, (e.w, s, e))
 
     while hq:
-        edge, s = heapq.heappop(hq)
+        _, s, edge = heapq.heappop(hq)
         v = edge.oppose(s)
         if v in visited:
             continue
@@ -33,8 +161,223 @@ def prims(s: int, G: 'UDGraph') -> list:
         edges[v] = edge
         visited.add(v)
 
-        for e in G.g(v):
+        for e in G.iter_edges(v):
             if e.oppose(v) not in visited:
-                heapq.heappush(hq, (e, v))
+                heapq.heappush(hq, (e.w, v, e))
+
+    return edges
+
+
+def _collect_edges(G):
+    """Return each edge once with endpoints and weights as lists."""
+    directed = G.directed
+    us, vs, ws, objs = [], [], [], []
+
+    for u in range(G.V):
+        for e in G.iter_edges(u):
+            v = e.oppose(u)
+            # undirected edge is stored on both endpoints
+            if v == u or (not directed and v < u):
+                continue
+            us.append(u)
+            vs.append(v)
+            ws.append(e.w)
+            objs.append(e)
+
+    return us, vs, ws, objs
+
+
+def _orient(n, s, us, vs, objs, chosen):
+    """Convert chosen edges to list of edge to parent rooted at s."""
+    adj = [[] for _ in range(n)]
+    for i in chosen:
+        adj[us[i]].append((vs[i], i))
+        adj[vs[i]].append((us[i], i))
+
+    edges = [None] * n
+    visited = bytearray(n)
+
+    for root in [s] + list(range(n)):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        queue = collections.deque([root])
+
+        while queue:
+            u = queue.popleft()
+            for v, i in adj[u]:
+                if not visited[v]:
+                    visited[v] = 1
+                    edges[v] = objs[i]
+                    queue.append(v)
 
     return edges
+
+
+def kruskal(G: 'UDGraph', s: int = 0) -> list:
+    """Minimum spanning forest by Kruskal's Algorithm.
+
+    Edge weights are sorted once as a list of indices,
+    hence edge objects are never compared.
+
+    Args:
+        G: UDGraph or CSRGraph
+            undirected graph object
+        s: int
+            root of the tree containing it,
+            other trees are rooted at their smallest vertex
+
+    Returns:
+        edges: list(UDEdge)
+           list of edge object for connection to parent
+           if root, set as None
+    """
+    us, vs, ws, objs = _collect_edges(G)
+    uf = UF(G.V)
+    chosen = []
+
+    for i in sorted(range(len(ws)), key=ws.__getitem__):
+        ru, rv = uf.find(us[i]), uf.find(vs[i])
+        if ru == rv:
+            continue
+        uf.union(ru, rv)
+        chosen.append(i)
+        if len(chosen) == G.V - 1:
+            break
+
+    return _orient(G.V, s, us, vs, objs, chosen)
+
+
+def _cheapest(us, vs, ws, comp, st, end):
+    """Cheapest edge of each component among edges in [st, end).
+
+    Ties are broken by edge index, so that the result is deterministic
+    and contracting the edges never makes a cycle.
+    """
+    best = {}
+    for i in range(st, end):
+        cu, cv = comp[us[i]], comp[vs[i]]
+        if cu == cv:
+            continue
+        key = (ws[i], i)
+        if cu not in best or key < best[cu]:
+            best[cu] = key
+        if cv not in best or key < best[cv]:
+            best[cv] = key
+    return best
+
+
+def _cheapest_shared(st, end):
+    return _cheapest(_shared['us'], _shared['vs'], _shared['ws'],
+                     _shared['comp'], st, end)
+
+
+def boruvka(G: 'UDGraph', s: int = 0, workers: int = None) -> list:
+    """Minimum spanning forest by Boruvka's Algorithm.
+
+    In each round, the cheapest edge of every component is found
+    and the components are contracted along them,
+    hence it takes O(log V) rounds.
+    The edges are scanned in chunks on worker processes
+    sharing the edge arrays through shared memory.
+
+    Args:
+        G: UDGraph or CSRGraph
+            undirected graph object
+        s: int
+            root of the tree containing it,
+            other trees are rooted at their smallest vertex
+        workers: int
+            number of processes (default: number of CPUs).
+            If 1, compute on the current process.
+
+    Returns:
+        edges: list(UDEdge)
+           list of edge object for connection to parent
+           if root, set as None
+    """
+    us, vs, ws, objs = _collect_edges(G)
+    n, m = G.V, len(ws)
+    workers = workers or os.cpu_count() or 1
+
+    arrays = {
+        'us': _typed_values('q', us),
+        'vs': _typed_values('q', vs),
+        'ws': _typed_values('q' if all(type(w) is int for w in ws) else 'd', ws),
+        'comp': _typed_values('q', range(n)),
+    }
+    shms = []
+    executor = None
+
+    try:
+        if workers > 1 and m > 0:
+            # labels are updated in shared memory between rounds
+            blocks = _share(arrays, shms)
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared,
+                                           initargs=(blocks,))
+
+        comp = arrays['comp']
+        size = -(-m // workers)
+        uf = UF(n)
+        chosen = []
+
+        while True:
+            if executor is None:
+                results = [_cheapest(arrays['us'], arrays['vs'], arrays['ws'], comp, 0, m)]
+            else:
+                results = list(executor.map(_cheapest_shared, range(0, m, size),
+                                            [min(st + size, m) for st in range(0, m, size)]))
+
+            best = {}
+            for result in results:
+                for c, key in result.items():
+                    if c not in best or key < best[c]:
+                        best[c] = key
+            if not best:
+                break
+
+            for _, i in sorted(set(best.values())):
+                ru, rv = uf.find(us[i]), uf.find(vs[i])
+                if ru != rv:
+                    uf.union(ru, rv)
+                    chosen.append(i)
+
+            for v in range(n):
+                comp[v] = uf.find(v)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        # release views before closing shared memory
+        comp = None
+        _release_shared(shms, arrays)
+
+    return _orient(n, s, us, vs, objs, chosen)
+
+
+def minimum_spanning_forest(G: 'UDGraph', s: int = 0, workers: int = None) -> list:
+    """Minimum spanning forest choosing algorithm by graph size and density.
+
+    Boruvka's Algorithm on worker processes is used for large dense graphs,
+    otherwise Kruskal's Algorithm.
+
+    Args:
+        G: UDGraph or CSRGraph
+            undirected graph object
+        s: int
+            root of the tree containing it
+        workers: int
+            number of processes for Boruvka's Algorithm (default: number of CPUs)
+
+    Returns:
+        edges: list(UDEdge)
+           list of edge object for connection to parent
+           if root, set as None
+    """
+    workers = workers or os.cpu_count() or 1
+    m = G.E
+    if not G.directed:
+        m //= 2
+
+    if workers > 1 and m >= _PARALLEL_THRESHOLD and m >= _DENSE_DEGREE * G.V:
+        return boruvka(G, s, workers)
+    return kruskal(G, s)
@@ -1,84 +1,773 @@
 #!/usr/bin/env python3
 
+import os
+import sys
 import heapq
+import collections
+from concurrent.futures import ProcessPoolExecutor
 
+from graph.base import _typed_buffer, _typed_values, _shared, _share, _attach_shared, \
+    _release_shared
+from graph.heap import IndexedHeap
+from graph.stats import _resolve
 
-def dijkastra(s: int, G: 'UDGraph') -> list:
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+
+_INF = float('inf')
+# number of children of indexed heap used by the algorithms
+_HEAP_ARITY = 4
+
+
+def _dijkastra_indexed(s, G):
+    dist = [_INF] * G.V
+    path = [-1] * G.V
+    dist[s] = 0
+
+    hq = IndexedHeap(G.V, _HEAP_ARITY)
+    hq.push(s, 0)
+
+    while hq:
+        u, d = hq.pop_min()
+
+        for e in G.iter_edges(u):
+            v = e.oppose(u)
+            w = d + e.w
+            if w < dist[v]:
+                if v in hq:
+                    hq.decrease_key(v, w)
+                else:
+                    hq.push(v, w)
+                dist[v] = w
+                path[v] = u
+
+    return path, dist
+
+
+def _dijkastra_stats(s, G, heap, stats):
+    """Instrumented `dijkastra`."""
+    with stats.phase('init'):
+        dist = [_INF] * G.V
+        path = [-1] * G.V
+        dist[s] = 0
+
+    with stats.phase('search'):
+        if heap == 'indexed':
+            hq = IndexedHeap(G.V, _HEAP_ARITY)
+            hq.push(s, 0)
+            stats.heap_pushes += 1
+
+            while hq:
+                u, d = hq.pop_min()
+                stats.heap_pops += 1
+                stats.vertices_settled += 1
+
+                for e in G.iter_edges(u):
+                    stats.edges_scanned += 1
+                    v = e.oppose(u)
+                    w = d + e.w
+                    if w < dist[v]:
+                        stats.relaxations += 1
+                        if v in hq:
+                            hq.decrease_key(v, w)
+                            stats.decrease_keys += 1
+                        else:
+                            hq.push(v, w)
+                            stats.heap_pushes += 1
+                        dist[v] = w
+                        path[v] = u
+        else:
+            hq = [(0, s)]
+            stats.heap_pushes += 1
+
+            while hq:
+                d, u = heapq.heappop(hq)
+                stats.heap_pops += 1
+
+                if d > dist[u]:
+                    stats.stale_pops += 1
+                    continue
+                stats.vertices_settled += 1
+
+                for e in G.iter_edges(u):
+                    stats.edges_scanned += 1
+                    v = e.oppose(u)
+                    w = d + e.w
+                    if w < dist[v]:
+                        stats.relaxations += 1
+                        dist[v] = w
+                        path[v] = u
+                        heapq.heappush(hq, (w, v))
+                        stats.heap_pushes += 1
+
+    stats._finish()
+    return path, dist
+
+
+def dijkastra(s: int, G: 'UDGraph', heap: str = 'heapq', stats=None) -> list:
     """Shortest path from source to all vertices.
 
     Args:
         s: int
             source node
-        G: UDGraph
-            undirected graph object which represents
-            the edges by UDEdge object
+        G: Graph or UDGraph
+            graph object with non-negative weights
+        heap: str
+            'heapq': push an entry on every relaxation,
+                and skip stale entries by comparing with the current distance
+            'indexed': use IndexedHeap with decrease-key,
+                which keeps the heap size O(V) on dense graphs
+        stats: AlgorithmStats or function
+            if given, run instrumented code to count heap operations,
+            relaxations, scanned edges and settled vertices, and time phases.
+            A function is called with a new AlgorithmStats when finished.
     Returns:
         path: list
             list of parent node, -1 if root
         dist: list
             list of cost to each node from source
     """
-    dist = [float('inf')] * G.V
+    if heap not in ('heapq', 'indexed'):
+        raise ValueError('heap must be chosen from (`heapq`, `indexed`)')
+    if stats is not None:
+        return _dijkastra_stats(s, G, heap, _resolve(stats))
+    if heap == 'indexed':
+        return _dijkastra_indexed(s, G)
+
+    dist = [_INF] * G.V
     path = [-1] * G.V
 
     # set 0 at source node
     dist[s] = 0
 
-    visited = {s}
+    hq = [(0, s)]
+
+    while hq:
+        d, u = heapq.heappop(hq)
+
+        # already settled with shorter distance
+        if d > dist[u]:
+            continue
+
+        for e in G.iter_edges(u):
+            v = e.oppose(u)
+            w = d + e.w
+            if w < dist[v]:
+                dist[v] = w
+                path[v] = u
+                heapq.heappush(hq, (w, v))
+
+    return path, dist
 
-    hq = []
 
-    for e in G.g(s):
-        heapq.heappush(hq, (e.w, s, e.oppose(s)))
+def _trace(parent, v):
+    path = []
+    while v != -1:
+        path.append(v)
+        v = parent[v]
+    return path[::-1]
+
+
+def astar(G: 'Graph', s: int, t: int, heuristic) -> (list, float):
+    """Shortest path between two vertices by A* search.
+
+    Args:
+        G: Graph or UDGraph
+            graph object with non-negative weights
+        s: int
+            source vertex
+        t: int
+            target vertex
+        heuristic: function
+            heuristic(u, t) returns lower bound of the distance from u to t.
+            This must be consistent to get the shortest path.
+
+    Returns:
+        path: list of int
+            vertices from s to t, empty if t is not reachable
+        dist: int or float
+            distance from s to t, inf if t is not reachable
+    """
+    dist = {s: 0}
+    parent = {s: -1}
+    hq = [(heuristic(s, t), 0, s)]
 
     while hq:
-        w, s, v = heapq.heappop(hq)
+        _, d, u = heapq.heappop(hq)
 
-        if v in visited:
+        if d > dist[u]:
             continue
+        if u == t:
+            return _trace(parent, t), d
+
+        for e in G.iter_edges(u):
+            v = e.oppose(u)
+            w = d + e.w
+            if w < dist.get(v, _INF):
+                dist[v] = w
+                parent[v] = u
+                heapq.heappush(hq, (w + heuristic(v, t), w, v))
+
+    return [], _INF
 
-        if w < dist[v]:
-            dist[v] = w
-            path[v] = s
 
-        visited.add(s)
+def shortest_path(G: 'Graph', s: int, t: int, heuristic=None) -> (list, float):
+    """Shortest path between two vertices.
 
-        for e in G.g(v):
-            heapq.heappush(hq, (e.w + dist[v], v, e.oppose(v)))
+    This is Dijkstra's algorithm which terminates when target is settled,
+    or A* search if heuristic is given.
+
+    Args:
+        G: Graph or UDGraph
+            graph object with non-negative weights
+        s: int
+            source vertex
+        t: int
+            target vertex
+        heuristic: function
+            heuristic(u, t) returns lower bound of the distance from u to t
+
+    Returns:
+        path: list of int
+            vertices from s to t, empty if t is not reachable
+        dist: int or float
+            distance from s to t, inf if t is not reachable
+    """
+    return astar(G, s, t, heuristic or (lambda u, t: 0))
+
+
+def bidirectional_dijkstra(G: 'Graph', s: int, t: int, R: 'Graph' = None) -> (list, float):
+    """Shortest path between two vertices by bidirectional Dijkstra.
+
+    Search from source on the graph and from target on the reversed graph
+    alternately, and stop when sum of both frontiers exceeds the best path.
+
+    Args:
+        G: Graph or UDGraph
+            graph object with non-negative weights
+        s: int
+            source vertex
+        t: int
+            target vertex
+        R: Graph
+            reversed graph of G. If not given, build it by `G.reverse()`,
+            hence set this for repeated queries on directed graph.
+
+    Returns:
+        path: list of int
+            vertices from s to t, empty if t is not reachable
+        dist: int or float
+            distance from s to t, inf if t is not reachable
+    """
+    if s == t:
+        return [s], 0
+    if R is None:
+        R = G.reverse()
+
+    graphs = (G, R)
+    dists = ({s: 0}, {t: 0})
+    parents = ({s: -1}, {t: -1})
+    heaps = ([(0, s)], [(0, t)])
+
+    best = _INF
+    meet = None
+
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+
+        # expand the side with smaller frontier
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        dist, other = dists[side], dists[1-side]
+        parent, hq = parents[side], heaps[side]
+
+        d, u = heapq.heappop(hq)
+        if d > dist[u]:
+            continue
+
+        for e in graphs[side].iter_edges(u):
+            v = e.oppose(u)
+            w = d + e.w
+            if w < dist.get(v, _INF):
+                dist[v] = w
+                parent[v] = u
+                heapq.heappush(hq, (w, v))
+                if v in other and w + other[v] < best:
+                    best = w + other[v]
+                    meet = v
+
+    if meet is None:
+        return [], _INF
+
+    return _trace(parents[0], meet) + _trace(parents[1], meet)[::-1][1:], best
+
+
+def _csr_dijkstra(indptr, indices, weights, s, n):
+    """Dijkstra's algorithm on CSR arrays."""
+    dist = [_INF] * n
+    path = [-1] * n
+    dist[s] = 0
+
+    hq = [(0, s)]
+
+    while hq:
+        d, u = heapq.heappop(hq)
+        if d > dist[u]:
+            continue
+
+        for i in range(indptr[u], indptr[u+1]):
+            v = indices[i]
+            w = d + weights[i]
+            if w < dist[v]:
+                dist[v] = w
+                path[v] = u
+                heapq.heappush(hq, (w, v))
 
     return path, dist
 
 
+def _bellman_ford_potentials(indptr, indices, weights):
+    """Potentials by Bellman-Ford from virtual vertex connected to all vertices.
+
+    Exceptions:
+        ValueError: if the graph contains negative cycle
+    """
+    n = len(indptr) - 1
+    h = [0] * n
+
+    # virtual vertex makes n + 1 vertices, hence n iterations are enough
+    for _ in range(n + 1):
+        changed = False
+        for u in range(n):
+            h_u = h[u]
+            for i in range(indptr[u], indptr[u+1]):
+                w = h_u + weights[i]
+                if w < h[indices[i]]:
+                    h[indices[i]] = w
+                    changed = True
+        if not changed:
+            return h
+
+    raise ValueError('Graph contains negative cycle')
+
+
+def _johnson(indptr, indices, weights, h, s, n):
+    path, dist = _csr_dijkstra(indptr, indices, weights, s, len(indptr) - 1)
+    for v, d in enumerate(dist):
+        if d != _INF:
+            dist[v] = d - h[s] + h[v]
+    return s, path[:n], dist[:n]
+
+
+def _johnson_shared(s):
+    return _johnson(_shared['indptr'], _shared['indices'], _shared['weights'],
+                    _shared['h'], s, _shared['n'])
+
+
+def all_pairs_shortest_paths(G: 'Graph', sources=None, workers: int = None):
+    """Shortest paths from multiple sources by Johnson's algorithm.
+
+    Edges are reweighted by potentials computed with Bellman-Ford,
+    so that negative weights are allowed, then Dijkstra's algorithm
+    runs for each source on worker processes sharing the graph
+    through shared memory.
+    Results are yielded per source, hence the full V x V matrix
+    is not built at once.
+
+    Args:
+        G: Graph, UDGraph or CSRGraph
+            graph object, undirected graph must not have negative weights
+        sources: iterable of int
+            source vertices (default: all vertices)
+        workers: int
+            number of processes (default: number of CPUs).
+            If 1, compute on the current process.
+
+    Yields:
+        s: int
+            source vertex
+        path: list
+            list of parent node, -1 if root
+        dist: list
+            list of cost to each node from source
+
+    Exceptions:
+        ValueError: if the graph contains negative cycle
+    """
+    C = G if hasattr(G, 'indptr') else G.freeze()
+    indptr, indices, weights = C.indptr, C.indices, C.weights
+    sources = range(G.V) if sources is None else sources
+    workers = workers or os.cpu_count() or 1
+
+    if any(w < 0 for w in weights):
+        h = _bellman_ford_potentials(indptr, indices, weights)
+        fmt = 'q' if all(type(x) is int for x in h) and weights.format == 'q' else 'd'
+        reweighted = _typed_buffer(fmt, len(weights))
+        for u in range(len(indptr) - 1):
+            for i in range(indptr[u], indptr[u+1]):
+                # clip rounding error of float weights
+                reweighted[i] = max(0, weights[i] + h[u] - h[indices[i]])
+        weights = reweighted
+    else:
+        h = [0] * (len(indptr) - 1)
+
+    if workers < 2:
+        for s in sources:
+            yield _johnson(indptr, indices, weights, h, s, G.V)
+        return
+
+    h_buf = _typed_values('d' if weights.format == 'd' else 'q', h)
+
+    arrays = {'indptr': indptr, 'indices': indices, 'weights': weights, 'h': h_buf}
+    shms = []
+    try:
+        blocks = _share(arrays, shms)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared,
+                                 initargs=(blocks, {'n': G.V})) as executor:
+            # bound the number of pending results
+            pending = collections.deque()
+            for s in sources:
+                pending.append(executor.submit(_johnson_shared, s))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    finally:
+        _release_shared(shms, arrays)
+
+
+class PathCache(object):
+    """Memoized shortest path trees over a graph with LRU eviction.
+
+    Trees computed by `dijkastra` are cached per source,
+    and evicted in least recently used order when the number of entries
+    or the estimated memory exceeds the limits.
+    The cache is cleared when the graph version changes,
+    that is, when an edge is added.
+
+    Usage:
+        >>> from graph.base import UDGraph
+        >>> G = UDGraph(3)
+        >>> G.add_edge(0, 1, 2)
+        >>> cache = PathCache(G, max_entries=100)
+        >>> cache.warm([0, 1])
+        >>> cache.get_path(0, 1)
+        ([0, 1], 2)
+        >>> cache.hits, cache.misses
+        (1, 2)
+    """
+    def __init__(self, G: 'Graph', max_entries: int = 128,
+                 max_bytes: int = None, heap: str = 'heapq'):
+        """Cache of shortest path trees.
+
+        Args:
+            G: Graph, UDGraph or CSRGraph
+                graph object
+            max_entries: int
+                maximum number of sources to cache
+            max_bytes: int
+                maximum estimated memory of cached trees in bytes
+                (default: unlimited)
+            heap: str
+                heap option passed to `dijkastra`
+        """
+        if max_entries < 1:
+            raise ValueError('max_entries must be positive')
+        self._G = G
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._heap = heap
+
+        self._trees = collections.OrderedDict()
+        self._nbytes = 0
+        self._version = getattr(G, 'version', 0)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._trees)
+
+    def __contains__(self, s):
+        self._validate_version()
+        return s in self._trees
+
+    @property
+    def nbytes(self):
+        """Estimated memory of cached trees in bytes."""
+        return self._nbytes
+
+    @staticmethod
+    def _size(path, dist):
+        # lists of pointers and boxed distances
+        return sys.getsizeof(path) + sys.getsizeof(dist) + 24 * len(dist)
+
+    def _validate_version(self):
+        version = getattr(self._G, 'version', 0)
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    def clear(self) -> None:
+        self._trees.clear()
+        self._nbytes = 0
+
+    def get(self, s: int) -> (tuple, tuple):
+        """Return shortest path tree from source.
+
+        Returns:
+            path: tuple
+                parent of each node, -1 if root
+            dist: tuple
+                cost to each node from source
+        """
+        self._validate_version()
+
+        tree = self._trees.get(s)
+        if tree is not None:
+            self.hits += 1
+            self._trees.move_to_end(s)
+            return tree
+
+        self.misses += 1
+        path, dist = dijkastra(s, self._G, self._heap)
+        tree = tuple(path), tuple(dist)
+
+        self._trees[s] = tree
+        self._nbytes += self._size(*tree)
+
+        while len(self._trees) > self._max_entries or \
+                (self._max_bytes is not None and self._nbytes > self._max_bytes
+                 and len(self._trees) > 1):
+            _, old = self._trees.popitem(last=False)
+            self._nbytes -= self._size(*old)
+
+        return tree
+
+    def get_path(self, s: int, t: int) -> (list, float):
+        """Return shortest path from source to target and the distance.
+
+        Path is empty if the target is not reachable.
+        """
+        path, dist = self.get(s)
+        if dist[t] == _INF:
+            return [], _INF
+        return _trace(path, t), dist[t]
+
+    def warm(self, sources) -> None:
+        """Compute trees for given sources in advance."""
+        for s in sources:
+            self.get(s)
+
+
+def _fw_python(dist, path):
+    V = len(dist)
+    for k in range(V):
+        dist_k = dist[k]
+        for i in range(V):
+            dist_ik = dist[i][k]
+            if dist_ik == _INF:
+                continue
+            dist_i, path_i = dist[i], path[i]
+            path_ik = path_i[k]
+            for j in range(V):
+                if i != j and dist_i[j] > dist_ik + dist_k[j]:
+                    dist_i[j] = dist_ik + dist_k[j]
+                    path_i[j] = path_ik
+
+
+def _fw_numpy(dist, path):
+    cand = _np.empty_like(dist)
+    mask = _np.empty(dist.shape, dtype=bool)
+    diag = _np.arange(min(dist.shape))
+
+    for k in range(len(dist)):
+        _np.add(dist[:, k, None], dist[None, k, :], out=cand)
+        _np.less(cand, dist, out=mask)
+        # keep the diagonal, same as python engine
+        mask[diag, diag] = False
+        _np.copyto(dist, cand, where=mask)
+        _np.copyto(path, path[:, k, None], where=mask)
+
+
+def _fw_blocked(dist, path, block):
+    V = len(dist)
+    blocks = [slice(st, min(st+block, V)) for st in range(0, V, block)]
+
+    for K in blocks:
+        b = K.stop - K.start
+        # column and row of each k in K at its own stage,
+        # so that the other blocks are relaxed in the same order as `_fw_numpy`
+        col_d = _np.empty((V, b), dtype=dist.dtype)
+        row_d = _np.empty((b, V), dtype=dist.dtype)
+        col_p = _np.empty((V, b), dtype=path.dtype)
+
+        # rows and columns crossing K
+        _fw_numpy_band(dist, path, K, col_d, row_d, col_p)
+
+        # remaining blocks only depend on the rows and columns above
+        for I in blocks:
+            if I == K:
+                continue
+            for J in blocks:
+                if J != K:
+                    _fw_tile(dist[I, J], path[I, J], col_d[I], row_d[:, J], col_p[I], I == J)
+
+
+def _fw_numpy_band(dist, path, K, col_d, row_d, col_p):
+    """Relax rows and columns in K through vertices in K,
+    and keep column and row of each k before it is used."""
+    V = len(dist)
+    off_diag = _np.arange(K.start, K.stop)[:, None] != _np.arange(V)[None, :]
+
+    for c, k in enumerate(range(K.start, K.stop)):
+        # row and column of k are not changed while relaxing through k
+        col_d[:, c] = dist[:, k]
+        row_d[c] = dist[k]
+        col_p[:, c] = path[:, k]
+
+        d, p = dist[K], path[K]
+        cand = col_d[K, c, None] + row_d[c, None, :]
+        mask = (cand < d) & off_diag
+        _np.copyto(d, cand, where=mask)
+        _np.copyto(p, col_p[K, c, None], where=mask)
+
+        d, p = dist[:, K], path[:, K]
+        cand = col_d[:, c, None] + row_d[c, None, K]
+        mask = (cand < d) & off_diag.T
+        _np.copyto(d, cand, where=mask)
+        _np.copyto(p, col_p[:, c, None], where=mask)
+
+
+def _fw_tile(d, p, d_ik, d_kj, p_ik, diagonal):
+    """Relax tile d through the block of vertices k.
+
+    The diagonal is kept if the tile is on the diagonal of the matrix.
+    """
+    cand = _np.empty_like(d)
+    mask = _np.empty(d.shape, dtype=bool)
+    diag = _np.arange(min(d.shape))
+
+    for k in range(d_ik.shape[1]):
+        _np.add(d_ik[:, k, None], d_kj[None, k, :], out=cand)
+        _np.less(cand, d, out=mask)
+        if diagonal:
+            mask[diag, diag] = False
+        _np.copyto(d, cand, where=mask)
+        _np.copyto(p, p_ik[:, k, None], where=mask)
+
+
 class FloydWarshall(object):
     """Floyd Warshall to find shortest path.
 
+    With numpy, each k-iteration is computed as broadcasted min-plus
+    over the whole matrix, or over cache-sized blocks if `block` is set.
+    Distances are stored in float64 (or float32 to halve memory)
+    and next hops in int32.
+    Blocked computation gives the same matrices as the plain one.
+
     Detail:
     https://en.wikipedia.org/wiki/Floyd%E2%80%93Warshall_algorithm
+
+    Usage:
+        >>> from graph.base import UDGraph
+        >>> G = UDGraph(4)
+        >>> G.add_edge(0, 3, 2)
+        >>> G.add_edge(0, 2, 0)
+        >>> G.add_edge(3, 1, 0)
+        >>> plain = FloydWarshall(G, engine='numpy')
+        >>> blocked = FloydWarshall(G, engine='numpy', block=2)
+        >>> bool((plain._path == blocked._path).all())
+        True
+        >>> blocked.get_path(0, 1)
+        ([0, 3, 1], [0, 2.0, 0.0])
     """
-    def __init__(self, G: 'Graph'):
-        dist = [[float('inf')] * G.V for _ in range(G.V)]
-        path = [[-1] * G.V for _ in range(G.V)]
+    def __init__(self, G: 'Graph', engine: str = None,
+                 dtype: str = 'float64', block: int = None):
+        """Compute all pairs shortest paths.
+
+        Args:
+            G: Graph
+                graph object
+            engine: str
+                'python' or 'numpy' (default: numpy if available)
+            dtype: str
+                'float64' or 'float32' for distance matrix of numpy engine
+            block: int
+                block size of numpy engine. If set, compute with
+                cache-blocked algorithm, which is faster for large graph.
+
+        Exceptions:
+            ImportError: if numpy engine is chosen without numpy
+        """
+        if engine is None:
+            engine = 'python' if _np is None else 'numpy'
+        if engine not in ('python', 'numpy'):
+            raise ValueError('Engine must be chosen from (`python`, `numpy`)')
+        if engine == 'numpy' and _np is None:
+            raise ImportError('numpy is required for numpy engine')
+        if engine == 'python' and (dtype != 'float64' or block is not None):
+            raise ValueError('dtype and block are only for numpy engine')
+
+        if engine == 'numpy':
+            dist = _np.full((G.V, G.V), _np.inf, dtype=dtype)
+            path = _np.full((G.V, G.V), -1, dtype=_np.int32)
+        else:
+            dist = [[_INF] * G.V for _ in range(G.V)]
+            path = [[-1] * G.V for _ in range(G.V)]
 
         # set weights on all edges to dist matrix
         for u in range(G.V):
-            for e in G.g(u):
-                dist[e.u][e.v] = e.w
-                path[e.u][e.v] = e.v
+            for e in G.iter_edges(u):
+                v = e.oppose(u)
+                if e.w < dist[u][v]:
+                    dist[u][v] = e.w
+                    path[u][v] = v
 
         for v in range(G.V):
             dist[v][v] = 0
             path[v][v] = v
 
-        for k in range(G.V):
-            for i in range(G.V):
-                for j in range(G.V):
-                    if i != j and dist[i][j] > dist[i][k] + dist[k][j]:
-                        dist[i][j] = dist[i][k] + dist[k][j]
-                        path[i][j] = path[i][k]
+        if engine == 'python':
+            _fw_python(dist, path)
+        elif block is not None:
+            _fw_blocked(dist, path, block)
+        else:
+            _fw_numpy(dist, path)
 
         self._dist = dist
         self._path = path
 
+    def save(self, dist_path: str, path_path: str) -> None:
+        """Save distance and next hop matrices as .npy files."""
+        if _np is None:
+            raise ImportError('numpy is required to save matrices')
+        _np.save(dist_path, _np.asarray(self._dist))
+        _np.save(path_path, _np.asarray(self._path, dtype=_np.int32))
+
+    @classmethod
+    def load(cls, dist_path: str, path_path: str, mmap: bool = True) -> 'FloydWarshall':
+        """Load matrices saved by `save()`.
+
+        Args:
+            dist_path: str
+                path to distance matrix
+            path_path: str
+                path to next hop matrix
+            mmap: bool
+                memory-map the files read-only instead of reading them
+        """
+        if _np is None:
+            raise ImportError('numpy is required to load matrices')
+        mode = 'r' if mmap else None
+        cls = cls.__new__(cls)
+        cls._dist = _np.load(dist_path, mmap_mode=mode)
+        cls._path = _np.load(path_path, mmap_mode=mode)
+        return cls
+
     def get_path(self, s, v) -> (list, list):
         """Return shortest path from source to destination.
 
@@ -92,16 +781,26 @@ class FloydWarshall(object):
                 path to target
             cost: list of int, float
                 list of costs for each step
+
+        Exceptions:
+            ValueError: if next hops make a cycle, e.g. by negative cycle
         """
         path = [s]
         cost = [0]
 
-        while s != v:
-            if s == -1:
-                return [], []
+        # a simple path has at most V - 1 hops
+        for _ in range(len(self._path)):
+            if s == v:
+                return path, cost
 
-            cost.append(self._dist[s][self._path[s][v]])
-            s = self._path[s][v]
+            step = int(self._path[s][v])
+            if step == -1:
+                return [], []
+            c = self._dist[s][step]
+            cost.append(c.item() if hasattr(c, 'item') else c)
+            s = step
             path.append(s)
 
+        if s != v:
+            raise ValueError('Next hop matrix contains a cycle')
         return path, cost
@@ -4,14 +4,64 @@ import collections
 from typing import List
 
 from graph.base import Graph
+from graph.stats import _resolve
 
 
-def kahn_sort(G: Graph) -> List[int]:
-    """Topological sort by Kahn's Algorithm."""
+def _kahn_sort_stats(G, stats):
+    """Instrumented `kahn_sort`."""
+    with stats.phase('in_degree'):
+        in_degree = [0] * G.V
+
+        for u in range(G.V):
+            for edge in G.iter_edges(u):
+                stats.edges_scanned += 1
+                in_degree[edge.v] += 1
+
+    with stats.phase('sort'):
+        vertices = collections.deque()
+        order = []
+
+        for u in range(G.V):
+            if in_degree[u] == 0:
+                vertices.append(u)
+
+        while vertices:
+            u = vertices.popleft()
+            order.append(u)
+            stats.vertices_settled += 1
+
+            for edge in G.iter_edges(u):
+                stats.edges_scanned += 1
+                stats.relaxations += 1
+                in_degree[edge.v] -= 1
+                if in_degree[edge.v] == 0:
+                    vertices.append(edge.v)
+
+    stats._finish()
+    return order if len(order) == G.V else []
+
+
+def kahn_sort(G: Graph, stats=None) -> List[int]:
+    """Topological sort by Kahn's Algorithm.
+
+    Args:
+        G: Graph
+            directed graph object
+        stats: AlgorithmStats or function
+            if given, run instrumented code to count scanned edges
+            and sorted vertices, and time phases
+
+    Returns:
+        order: list of int
+            vertices in topological order, empty if the graph is not DAG
+    """
+    if stats is not None:
+        return _kahn_sort_stats(G, _resolve(stats))
+
     in_degree = [0] * G.V
 
     for u in range(G.V):
-        for edge in G.g(u):
+        for edge in G.iter_edges(u):
             in_degree[edge.v] += 1
 
     vertices = collections.deque()
@@ -25,10 +75,235 @@ def kahn_sort(G: Graph) -> List[int]:
         u = vertices.popleft()
         order.append(u)
 
-        for edge in G.g(u):
+        for edge in G.iter_edges(u):
             in_degree[edge.v] -= 1
             if in_degree[edge.v] == 0:
                 vertices.append(edge.v)
 
     # return empty if not DAG
     return order if len(order) == G.V else []
+
+
+def kahn_levels(G: Graph) -> List[List[int]]:
+    """Topological sort grouped into levels by Kahn's Algorithm.
+
+    Each level contains vertices whose predecessors are all
+    in the previous levels, hence vertices in the same level
+    are independent of each other and can be processed concurrently.
+
+    Returns:
+        levels: list of list of int
+            vertices in each level in ascending order,
+            empty if the graph is not DAG
+    """
+    in_degree = [0] * G.V
+
+    for u in range(G.V):
+        for edge in G.iter_edges(u):
+            in_degree[edge.v] += 1
+
+    level = [u for u in range(G.V) if in_degree[u] == 0]
+    levels = []
+    count = 0
+
+    while level:
+        levels.append(level)
+        count += len(level)
+        nxt = []
+
+        for u in level:
+            for edge in G.iter_edges(u):
+                in_degree[edge.v] -= 1
+                if in_degree[edge.v] == 0:
+                    nxt.append(edge.v)
+
+        nxt.sort()
+        level = nxt
+
+    # return empty if not DAG
+    return levels if count == G.V else []
+
+
+class CycleError(ValueError):
+    """Raised when an edge makes a cycle.
+
+    Attributes:
+        cycle: list of int
+            vertices on the cycle in order,
+            the last vertex has an edge to the first one
+    """
+    def __init__(self, message, cycle):
+        super(CycleError, self).__init__(message)
+        self.cycle = cycle
+
+
+class IncrementalTopoOrder(object):
+    """Topological order maintained while edges are added.
+
+    When an edge u -> v breaks the order, only vertices between
+    v and u in the current order which are reachable from v
+    or reach u are reordered, instead of sorting the whole graph again.
+
+    Detail:
+    Pearce and Kelly, A Dynamic Topological Sort Algorithm
+    for Directed Acyclic Graphs (2006)
+
+    Usage:
+        >>> G = Graph(3)
+        >>> topo = IncrementalTopoOrder(G)
+        >>> topo.add_edge(2, 1)
+        >>> topo.add_edge(1, 0)
+        >>> topo.order
+        [2, 1, 0]
+        >>> topo.add_edge(0, 2)
+        Traceback (most recent call last):
+        ...
+        graph.sort.CycleError: Edge (0, 2) makes a cycle: [0, 2, 1]
+    """
+    def __init__(self, G: Graph):
+        """Topological order of directed graph.
+
+        Args:
+            G: Graph
+                directed graph, edges are added to this graph
+
+        Exceptions:
+            CycleError: if the graph is not DAG
+        """
+        self._G = G
+        self._build()
+
+    def _build(self):
+        G = self._G
+        order = kahn_sort(G)
+        if len(order) != G.V:
+            raise CycleError('Graph is not DAG', self._find_cycle())
+
+        # vertex at each position and position of each vertex
+        self._order = order
+        self._pos = [0] * G.V
+        for i, u in enumerate(order):
+            self._pos[u] = i
+
+        self._rev = [[] for _ in range(G.V)]
+        for u in range(G.V):
+            for edge in G.iter_edges(u):
+                self._rev[edge.v].append(u)
+
+        self._version = G.version
+
+    def _find_cycle(self):
+        G = self._G
+        # 0: not visited, 1: on stack, 2: done
+        state = bytearray(G.V)
+
+        for s in range(G.V):
+            if state[s]:
+                continue
+            state[s] = 1
+            path = [s]
+            stack = [G.iter_edges(s)]
+
+            while stack:
+                for edge in stack[-1]:
+                    v = edge.v
+                    if state[v] == 1:
+                        return path[path.index(v):]
+                    if not state[v]:
+                        state[v] = 1
+                        path.append(v)
+                        stack.append(G.iter_edges(v))
+                        break
+                else:
+                    state[path.pop()] = 2
+                    stack.pop()
+
+        return []
+
+    @property
+    def order(self) -> List[int]:
+        """Current topological order."""
+        if self._version != self._G.version:
+            self._build()
+        return self._order[:]
+
+    def index(self, u: int) -> int:
+        """Position of vertex in current topological order."""
+        if self._version != self._G.version:
+            self._build()
+        return self._pos[u]
+
+    def _forward(self, v, u):
+        """Vertices reachable from v up to position of u.
+
+        Exceptions:
+            CycleError: if u is reachable from v
+        """
+        pos, G = self._pos, self._G
+        ub = pos[u]
+        parent = {v: None}
+        stack = [v]
+
+        while stack:
+            x = stack.pop()
+            for edge in G.iter_edges(x):
+                y = edge.v
+                if y == u:
+                    cycle = [x]
+                    while parent[cycle[-1]] is not None:
+                        cycle.append(parent[cycle[-1]])
+                    cycle.append(u)
+                    raise CycleError(f'Edge ({u}, {v}) makes a cycle: {cycle[::-1]}',
+                                     cycle[::-1])
+                if y not in parent and pos[y] < ub:
+                    parent[y] = x
+                    stack.append(y)
+
+        return list(parent)
+
+    def _backward(self, u, v):
+        """Vertices reaching u down to position of v."""
+        pos, rev = self._pos, self._rev
+        lb = pos[v]
+        visited = {u}
+        stack = [u]
+
+        while stack:
+            x = stack.pop()
+            for y in rev[x]:
+                if y not in visited and pos[y] > lb:
+                    visited.add(y)
+                    stack.append(y)
+
+        return list(visited)
+
+    def add_edge(self, u: int, v: int, w=0) -> None:
+        """Add edge u -> v to the graph and update the order.
+
+        Exceptions:
+            CycleError: if the edge makes a cycle,
+                in that case the edge is not added
+        """
+        if self._version != self._G.version:
+            self._build()
+        if u == v:
+            raise CycleError(f'Edge ({u}, {v}) makes a cycle: {[u]}', [u])
+
+        pos = self._pos
+        if pos[u] > pos[v]:
+            forward = self._forward(v, u)
+            backward = self._backward(u, v)
+
+            forward.sort(key=pos.__getitem__)
+            backward.sort(key=pos.__getitem__)
+
+            # vertices reaching u move before vertices reachable from v
+            vertices = backward + forward
+            slots = sorted(pos[x] for x in vertices)
+            for i, x in zip(slots, vertices):
+                pos[x] = i
+                self._order[i] = x
+
+        self._G.add_edge(u, v, w)
+        self._rev[v].append(u)
+        self._version = self._G.version
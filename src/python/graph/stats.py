@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+#
+# Counters for instrumented graph algorithms.
+#
+# Algorithms taking `stats` argument run separate instrumented code path
+# only when it is given, hence there is no overhead by default.
+
+import time
+import contextlib
+
+
+class AlgorithmStats(object):
+    """Counters and phase timings of a graph algorithm run.
+
+    Counters are accumulated over runs until `reset` is called,
+    so that the same object can be passed to many queries.
+
+    Usage:
+        >>> from graph.base import UDGraph
+        >>> from graph.path import dijkastra
+        >>> from graph.stats import AlgorithmStats
+        >>> G = UDGraph(4)
+        >>> for u, v, w in [(0, 1, 1), (1, 2, 2), (0, 2, 5), (2, 3, 1)]:
+        ...     G.add_edge(u, v, w)
+        >>> stats = AlgorithmStats()
+        >>> path, dist = dijkastra(0, G, stats=stats)
+        >>> dist
+        [0, 1, 3, 4]
+        >>> stats.stale_pops
+        1
+        >>> stats.heap_pops - stats.stale_pops == stats.vertices_settled
+        True
+        >>> sorted(stats.phases)
+        ['init', 'search']
+    """
+    _COUNTERS = (
+        'heap_pushes',
+        'heap_pops',
+        'stale_pops',
+        'decrease_keys',
+        'relaxations',
+        'edges_scanned',
+        'vertices_settled',
+    )
+
+    def __init__(self, callback=None):
+        """Stats object.
+
+        Args:
+            callback: function
+                called with this object when each run finishes
+        """
+        self._callback = callback
+        self.runs = 0
+        self.phases = {}
+        self.reset()
+
+    def reset(self) -> None:
+        for name in self._COUNTERS:
+            setattr(self, name, 0)
+        self.runs = 0
+        self.phases.clear()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Measure elapsed time of a phase and add it to `phases`."""
+        st = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.) + time.perf_counter() - st
+
+    def _finish(self):
+        self.runs += 1
+        if self._callback is not None:
+            self._callback(self)
+
+    def as_dict(self) -> dict:
+        result = {name: getattr(self, name) for name in self._COUNTERS}
+        result['runs'] = self.runs
+        result['phases'] = dict(self.phases)
+        return result
+
+    def __repr__(self):
+        counters = ', '.join(f'{name}={getattr(self, name)}' for name in self._COUNTERS)
+        return f'AlgorithmStats({counters})'
+
+
+def _resolve(stats):
+    """Accept stats object or callback which receives a new stats object."""
+    if isinstance(stats, AlgorithmStats):
+        return stats
+    if callable(stats):
+        return AlgorithmStats(stats)
+    raise TypeError('stats must be AlgorithmStats or callable')
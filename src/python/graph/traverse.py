@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+#
+# Iterative graph traversals and connectivity.
+#
+# None of the functions recurse, hence graphs of any depth can be processed.
+# Visited flags are kept in bytearray and per-vertex integers
+# in typed buffers, which take 1 and 4 (or 8) bytes per vertex.
+
+import collections
+
+from graph.base import _typed_buffer
+
+
+def _int_buffer(n, fill=0):
+    buf = _typed_buffer('i' if n < 1 << 31 else 'q', n)
+    if fill:
+        for i in range(n):
+            buf[i] = fill
+    return buf
+
+
+def bfs(G: 'Graph', s: int):
+    """Iterate over vertices reachable from s in breadth first order.
+
+    Args:
+        G: Graph, UDGraph or CSRGraph
+            graph object
+        s: int
+            source vertex
+
+    Yields:
+        v: int
+            visited vertex
+    """
+    neighbors = G.neighbors
+    visited = bytearray(G.V)
+    visited[s] = 1
+    queue = collections.deque([s])
+
+    while queue:
+        u = queue.popleft()
+        yield u
+        for v in neighbors(u):
+            if not visited[v]:
+                visited[v] = 1
+                queue.append(v)
+
+
+def dfs(G: 'Graph', s: int, order: str = 'pre'):
+    """Iterate over vertices reachable from s in depth first order.
+
+    Neighbors are visited in the order of edges,
+    which is the same order as recursive implementation.
+
+    Args:
+        G: Graph, UDGraph or CSRGraph
+            graph object
+        s: int
+            source vertex
+        order: str
+            'pre': yield vertex when it is discovered
+            'post': yield vertex when all its descendants are finished
+
+    Yields:
+        v: int
+            visited vertex
+    """
+    if order not in ('pre', 'post'):
+        raise ValueError('order must be chosen from (`pre`, `post`)')
+    pre = order == 'pre'
+
+    neighbors = G.neighbors
+    visited = bytearray(G.V)
+    visited[s] = 1
+    if pre:
+        yield s
+
+    vertices = [s]
+    iters = [iter(neighbors(s))]
+
+    while iters:
+        for v in iters[-1]:
+            if not visited[v]:
+                visited[v] = 1
+                if pre:
+                    yield v
+                vertices.append(v)
+                iters.append(iter(neighbors(v)))
+                break
+        else:
+            iters.pop()
+            u = vertices.pop()
+            if not pre:
+                yield u
+
+
+def direction_optimizing_bfs(G: 'Graph', s: int, alpha: int = 14, beta: int = 24):
+    """Breadth first search switching between top-down and bottom-up steps.
+
+    Top-down step scans edges from the frontier,
+    while bottom-up step scans edges into unvisited vertices
+    and stops at the first parent found in the frontier.
+    Bottom-up is used when the frontier has many edges,
+    which happens in the middle levels of low-diameter graphs,
+    so that most of the edges are not scanned.
+
+    Detail:
+    Beamer, Asanovic and Patterson, Direction-Optimizing Breadth-First Search (2012)
+
+    Args:
+        G: Graph, UDGraph or CSRGraph
+            graph object
+        s: int
+            source vertex
+        alpha: int
+            switch to bottom-up when edges from frontier
+            exceeds unexplored edges / alpha
+        beta: int
+            switch back to top-down when frontier size
+            is less than V / beta
+
+    Returns:
+        path: memoryview
+            parent of each vertex, -1 if root or not reachable
+        depth: memoryview
+            number of edges from source, -1 if not reachable
+    """
+    n = G.V
+    neighbors = G.neighbors
+    degree = G.degree
+    # bottom-up step follows edges backward
+    in_neighbors = neighbors if not G.directed else G.reverse().neighbors
+
+    path = _int_buffer(n, -1)
+    depth = _int_buffer(n, -1)
+    visited = bytearray(n)
+    visited[s] = 1
+    depth[s] = 0
+
+    frontier = [s]
+    unexplored = sum(degree(u) for u in range(n))
+    level = 0
+    bottom_up = False
+
+    while frontier:
+        level += 1
+        scout = sum(degree(u) for u in frontier)
+        unexplored -= scout
+
+        if not bottom_up and scout > unexplored / alpha:
+            bottom_up = True
+        elif bottom_up and len(frontier) < n / beta:
+            bottom_up = False
+
+        nxt = []
+        if bottom_up:
+            in_frontier = bytearray(n)
+            for u in frontier:
+                in_frontier[u] = 1
+            for v in range(n):
+                if visited[v]:
+                    continue
+                for u in in_neighbors(v):
+                    if in_frontier[u]:
+                        visited[v] = 1
+                        path[v] = u
+                        depth[v] = level
+                        nxt.append(v)
+                        break
+        else:
+            for u in frontier:
+                for v in neighbors(u):
+                    if not visited[v]:
+                        visited[v] = 1
+                        path[v] = u
+                        depth[v] = level
+                        nxt.append(v)
+
+        frontier = nxt
+
+    return path, depth
+
+
+def _tarjan(G):
+    n = G.V
+    neighbors = G.neighbors
+    # discovery index starting from 1, 0 if not visited
+    index = _int_buffer(n)
+    low = _int_buffer(n)
+    on_stack = bytearray(n)
+    stack = []
+    components = []
+    counter = 0
+
+    for s in range(n):
+        if index[s]:
+            continue
+
+        counter += 1
+        index[s] = low[s] = counter
+        on_stack[s] = 1
+        stack.append(s)
+        vertices = [s]
+        iters = [iter(neighbors(s))]
+
+        while iters:
+            u = vertices[-1]
+            for v in iters[-1]:
+                if not index[v]:
+                    counter += 1
+                    index[v] = low[v] = counter
+                    on_stack[v] = 1
+                    stack.append(v)
+                    vertices.append(v)
+                    iters.append(iter(neighbors(v)))
+                    break
+                elif on_stack[v] and index[v] < low[u]:
+                    low[u] = index[v]
+            else:
+                iters.pop()
+                vertices.pop()
+                if vertices and low[u] < low[vertices[-1]]:
+                    low[vertices[-1]] = low[u]
+
+                if low[u] == index[u]:
+                    component = []
+                    while True:
+                        v = stack.pop()
+                        on_stack[v] = 0
+                        component.append(v)
+                        if v == u:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def _postorder(G):
+    """Vertices of all DFS trees in postorder."""
+    n = G.V
+    neighbors = G.neighbors
+    visited = bytearray(n)
+    order = []
+
+    for s in range(n):
+        if visited[s]:
+            continue
+        visited[s] = 1
+        vertices = [s]
+        iters = [iter(neighbors(s))]
+
+        while iters:
+            for v in iters[-1]:
+                if not visited[v]:
+                    visited[v] = 1
+                    vertices.append(v)
+                    iters.append(iter(neighbors(v)))
+                    break
+            else:
+                iters.pop()
+                order.append(vertices.pop())
+
+    return order
+
+
+def _kosaraju(G):
+    order = _postorder(G)
+    neighbors = G.reverse().neighbors
+    visited = bytearray(G.V)
+    components = []
+
+    for s in reversed(order):
+        if visited[s]:
+            continue
+        visited[s] = 1
+        component = [s]
+        stack = [s]
+
+        while stack:
+            u = stack.pop()
+            for v in neighbors(u):
+                if not visited[v]:
+                    visited[v] = 1
+                    component.append(v)
+                    stack.append(v)
+
+        components.append(component)
+
+    return components
+
+
+def strongly_connected_components(G: 'Graph', algorithm: str = 'tarjan') -> list:
+    """Strongly connected components of directed graph.
+
+    Args:
+        G: Graph or CSRGraph
+            directed graph object
+        algorithm: str
+            'tarjan': single pass, components are in reverse topological order
+            'kosaraju': two passes over the graph and its reverse,
+                components are in topological order
+
+    Returns:
+        components: list of list of int
+            vertices of each component
+    """
+    if algorithm == 'tarjan':
+        return _tarjan(G)
+    if algorithm == 'kosaraju':
+        return _kosaraju(G)
+    raise ValueError('algorithm must be chosen from (`tarjan`, `kosaraju`)')
+
+
+def _lowlink(G):
+    """Find articulation points and bridges of undirected graph."""
+    n = G.V
+    neighbors = G.neighbors
+    disc = _int_buffer(n)
+    low = _int_buffer(n)
+    parent = _int_buffer(n, -1)
+    # whether the edge to parent has been skipped,
+    # so that parallel edges to parent are counted as back edges
+    skipped = bytearray(n)
+    points = bytearray(n)
+    bridges = []
+    counter = 0
+
+    for s in range(n):
+        if disc[s]:
+            continue
+
+        counter += 1
+        disc[s] = low[s] = counter
+        children = 0
+        vertices = [s]
+        iters = [iter(neighbors(s))]
+
+        while iters:
+            u = vertices[-1]
+            for v in iters[-1]:
+                if v == parent[u] and not skipped[u]:
+                    skipped[u] = 1
+                elif disc[v]:
+                    if disc[v] < low[u]:
+                        low[u] = disc[v]
+                else:
+                    counter += 1
+                    disc[v] = low[v] = counter
+                    parent[v] = u
+                    vertices.append(v)
+                    iters.append(iter(neighbors(v)))
+                    break
+            else:
+                iters.pop()
+                vertices.pop()
+                if not vertices:
+                    continue
+
+                p = vertices[-1]
+                if low[u] < low[p]:
+                    low[p] = low[u]
+                if low[u] > disc[p]:
+                    bridges.append((p, u))
+                if p == s:
+                    children += 1
+                elif low[u] >= disc[p]:
+                    points[p] = 1
+
+        if children > 1:
+            points[s] = 1
+
+    return [u for u in range(n) if points[u]], bridges
+
+
+def articulation_points(G: 'UDGraph') -> list:
+    """Vertices whose removal disconnects undirected graph.
+
+    Returns:
+        vertices: list of int
+            in ascending order
+    """
+    return _lowlink(G)[0]
+
+
+def bridges(G: 'UDGraph') -> list:
+    """Edges whose removal disconnects undirected graph.
+
+    Parallel edges are never bridges.
+
+    Returns:
+        edges: list of tuple(int, int)
+            (parent, child) in DFS tree
+    """
+    return _lowlink(G)[1]
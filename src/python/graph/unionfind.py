@@ -1,12 +1,38 @@
 #!/usr/bin/env python3
 
+from graph.base import _typed_buffer
+
+
+def _index_format(n):
+    return 'i' if n < 1 << 31 else 'q'
+
 
 class UF(object):
+    """Union-find with union by size and path halving.
+
+    Parents and sizes are stored in typed buffers,
+    which take 4 bytes per vertex instead of a pointer and an int object.
+    Vertices are in range [0, n], so that both 0-indexed
+    and 1-indexed vertices can be used.
+
+    Usage:
+        >>> uf = UF(5)
+        >>> uf.union_many([1, 3], [2, 4])
+        2
+        >>> uf.connected(1, 2)
+        True
+        >>> uf.find_many([2, 4]) == [uf.find(1), uf.find(3)]
+        True
+    """
     def __init__(self, n: int):
         self._n = n
-        self.parent = list(range(n+1))
+        fmt = _index_format(n + 1)
+        self.parent = _typed_buffer(fmt, n + 1)
+        self.size = _typed_buffer(fmt, n + 1)
+        for v in range(n + 1):
+            self.parent[v] = v
+            self.size[v] = 1
         self._count = n
-        self.rank = [1] * (n + 1)
 
     @property
     def count(self):
@@ -16,29 +42,212 @@ class UF(object):
         if v < 0 or v > self._n:
             raise ValueError('Given vertex is out of range')
 
+    def _validate_many(self, vs):
+        if len(vs) and (min(vs) < 0 or max(vs) > self._n):
+            raise ValueError('Given vertex is out of range')
+
     def find(self, v: int) -> int:
         self._validate(v)
+        parent = self.parent
 
-        while (self.parent[v] != v):
-            self.parent[v] = self.parent[self.parent[v]]
-            v = self.parent[v]
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
         return v
 
-    def union(self, u: int, v: int) -> None:
+    def _link(self, root_u, root_v):
+        size = self.size
+        if size[root_u] < size[root_v]:
+            root_u, root_v = root_v, root_u
+        self.parent[root_v] = root_u
+        size[root_u] += size[root_v]
+        self._count -= 1
+        return root_u, root_v
+
+    def union(self, u: int, v: int) -> bool:
+        """Merge components of u and v.
+
+        Returns:
+            merged: bool
+                False if u and v are already connected
+        """
         root_u = self.find(u)
         root_v = self.find(v)
 
         if root_u == root_v:
-            return
-
-        if self.rank[root_u] > self.rank[root_v]:
-            self.parent[v] = root_u
-        elif self.rank[root_v] > self.rank[root_u]:
-            self.parent[u] = root_v
-        else:
-            self.parent[v] = root_u
-            self.rank[root_u] += 1
-        self._count -= 1
+            return False
+
+        self._link(root_u, root_v)
+        return True
 
     def connected(self, u: int, v: int) -> bool:
         return self.find(u) == self.find(v)
+
+    def union_many(self, us, vs) -> int:
+        """Merge components of each pair (us[i], vs[i]).
+
+        Vertices are validated once for the whole batch.
+
+        Args:
+            us: sequence of int
+            vs: sequence of int
+                endpoints such as lists, typed buffers or numpy arrays
+
+        Returns:
+            merged: int
+                number of pairs which were not connected
+        """
+        if len(us) != len(vs):
+            raise ValueError('us and vs must have the same length')
+        self._validate_many(us)
+        self._validate_many(vs)
+
+        parent, size = self.parent, self.size
+        merged = 0
+
+        for u, v in zip(us, vs):
+            while parent[u] != u:
+                parent[u] = parent[parent[u]]
+                u = parent[u]
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+
+            if u == v:
+                continue
+            if size[u] < size[v]:
+                u, v = v, u
+            parent[v] = u
+            size[u] += size[v]
+            merged += 1
+
+        self._count -= merged
+        return merged
+
+    def find_many(self, vs) -> list:
+        """Return root of each vertex."""
+        self._validate_many(vs)
+        parent = self.parent
+        roots = []
+
+        for v in vs:
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            roots.append(v)
+
+        return roots
+
+    def component_sizes(self) -> dict:
+        """Return dict of root to number of vertices in the component."""
+        parent, size = self.parent, self.size
+        return {v: size[v] for v in range(self._n + 1) if parent[v] == v}
+
+    def labels(self) -> memoryview:
+        """Label components with consecutive ids from 0.
+
+        Ids are assigned in order of the smallest vertex in each component,
+        and all paths are compressed to the roots.
+
+        Returns:
+            labels: memoryview
+                component id of each vertex
+        """
+        n = self._n + 1
+        parent = self.parent
+        labels = _typed_buffer(parent.format, n)
+        ids = {}
+
+        for v in range(n):
+            root = v
+            while parent[root] != root:
+                root = parent[root]
+            # point the whole path to the root
+            while parent[v] != root:
+                parent[v], v = root, parent[v]
+            labels[v] = ids.setdefault(root, len(ids))
+
+        for v in range(n):
+            labels[v] = labels[parent[v]]
+
+        return labels
+
+
+class RollbackUF(UF):
+    """Union-find whose unions can be undone.
+
+    Paths are not compressed so that each union changes only a root,
+    hence `find` takes O(log n) time by union by size.
+    This is used for offline dynamic connectivity,
+    where edges are added and removed in stack order.
+
+    Usage:
+        >>> uf = RollbackUF(5)
+        >>> uf.union(1, 2)
+        True
+        >>> state = uf.snapshot()
+        >>> uf.union(2, 3)
+        True
+        >>> uf.rollback(state)
+        >>> uf.connected(1, 3)
+        False
+    """
+    def __init__(self, n: int):
+        super(RollbackUF, self).__init__(n)
+        # linked roots in order, (None, None) if not merged
+        self._history = []
+
+    def find(self, v: int) -> int:
+        self._validate(v)
+        parent = self.parent
+
+        while parent[v] != v:
+            v = parent[v]
+        return v
+
+    def union(self, u: int, v: int) -> bool:
+        root_u = self.find(u)
+        root_v = self.find(v)
+
+        if root_u == root_v:
+            self._history.append((None, None))
+            return False
+
+        self._history.append(self._link(root_u, root_v))
+        return True
+
+    def union_many(self, us, vs) -> int:
+        if len(us) != len(vs):
+            raise ValueError('us and vs must have the same length')
+        return sum(self.union(u, v) for u, v in zip(us, vs))
+
+    def find_many(self, vs) -> list:
+        return [self.find(v) for v in vs]
+
+    def labels(self) -> memoryview:
+        n = self._n + 1
+        labels = _typed_buffer(self.parent.format, n)
+        ids = {}
+        for v in range(n):
+            labels[v] = ids.setdefault(self.find(v), len(ids))
+        return labels
+
+    def snapshot(self) -> int:
+        """Return current state to roll back to."""
+        return len(self._history)
+
+    def rollback(self, state: int = None) -> None:
+        """Undo unions made after the state, or the last union if not given."""
+        if state is None:
+            state = len(self._history) - 1
+        if state < 0 or state > len(self._history):
+            raise ValueError('Invalid state to roll back')
+
+        parent, size = self.parent, self.size
+        while len(self._history) > state:
+            root_u, root_v = self._history.pop()
+            if root_u is None:
+                continue
+            parent[root_v] = root_v
+            size[root_u] -= size[root_v]
+            self._count += 1
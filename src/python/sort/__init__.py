@@ -1,5 +1,11 @@
 #!/usr/bin/env python3
 
-from ._base import quick_sort
+from ._base import quick_sort, argsort
+from .parallel import parallel_sort
+from .external import external_sort
+from .radix import counting_sort, radix_sort
 
-__all__ = ['quick_sort']
+__all__ = [
+    'quick_sort', 'argsort', 'parallel_sort', 'external_sort',
+    'counting_sort', 'radix_sort',
+]
@@ -1,19 +1,90 @@
 #!/usr/bin/env python3
 
-import random
+import logging
 from typing import List
 
+from ._typed import is_buffer, sort_buffer, argsort_buffer
+from .radix import counting_sort, radix_sort, radix_passes
 
-def _qsort(st, end, arr):
-    if st >= end:
-        return
-    if end - st == 1:
-        if arr[st] > arr[end]:
-            arr[st], arr[end] = arr[end], arr[st]
 
-        return
+_log = logging.getLogger(__name__)
+
+
+# ranges smaller than this are finished by insertion sort
+_INSERTION_CUTOFF = 16
+# ranges larger than this pick the pivot by Tukey's ninther
+_NINTHER_CUTOFF = 40
+# number of values sampled to estimate the duplicate ratio
+_DUPLICATE_SAMPLES = 64
+# use three-way partitioning when the sampled duplicate ratio reaches this
+_DUPLICATE_RATIO = 0.5
+# integer lists smaller than this are always sorted by comparison
+_DISPATCH_CUTOFF = 256
+# use counting sort when range of values is within this factor of length
+_COUNTING_FACTOR = 2
+
+
+def _insertion_sort(arr, st, end):
+    for i in range(st + 1, end + 1):
+        val = arr[i]
+        j = i - 1
+        while j >= st and arr[j] > val:
+            arr[j+1] = arr[j]
+            j -= 1
+        arr[j+1] = val
+
+
+def _sift_down(arr, st, root, end):
+    # `root` and `end` are offsets from `st`
+    val = arr[st+root]
+    child = 2 * root + 1
+    while child <= end:
+        if child < end and arr[st+child] < arr[st+child+1]:
+            child += 1
+        if not val < arr[st+child]:
+            break
+        arr[st+root] = arr[st+child]
+        root = child
+        child = 2 * root + 1
+    arr[st+root] = val
+
+
+def _heapsort(arr, st, end):
+    n = end - st
+    for root in range(n // 2, -1, -1):
+        _sift_down(arr, st, root, n)
+
+    for last in range(n, 0, -1):
+        arr[st], arr[st+last] = arr[st+last], arr[st]
+        _sift_down(arr, st, 0, last-1)
+
+
+def _median_of_three(arr, a, b, c):
+    if arr[a] < arr[b]:
+        if arr[b] < arr[c]:
+            return b
+        return c if arr[a] < arr[c] else a
+    if arr[a] < arr[c]:
+        return a
+    return c if arr[b] < arr[c] else b
 
-    pivot = random.randint(st, end)
+
+def _choose_pivot(arr, st, end):
+    mid = (st + end) // 2
+    if end - st < _NINTHER_CUTOFF:
+        return _median_of_three(arr, st, mid, end)
+
+    step = (end - st) // 8
+    return _median_of_three(
+        arr,
+        _median_of_three(arr, st, st+step, st+2*step),
+        _median_of_three(arr, mid-step, mid, mid+step),
+        _median_of_three(arr, end-2*step, end-step, end),
+    )
+
+
+def _partition(arr, st, end):
+    pivot = _choose_pivot(arr, st, end)
     arr[pivot], arr[end] = arr[end], arr[pivot]
 
     target = arr[end]
@@ -25,10 +96,173 @@ def _qsort(st, end, arr):
             left += 1
     arr[left], arr[end] = arr[end], arr[left]
 
-    _qsort(st, left-1, arr)
-    _qsort(left+1, end, arr)
+    return left
+
+
+def _partition3(arr, st, end, pivot):
+    """Three-way (Dutch national flag) partition of arr[st:end+1].
+
+    Args:
+        arr: list
+            target array
+        st: int
+            index of starting point
+        end: int
+            index of end point inclusive
+        pivot: int
+            index of the pivot value
+
+    Returns:
+        lt, gt: int
+            arr[st:lt] < pivot, arr[lt:gt+1] == pivot
+            and arr[gt+1:end+1] > pivot
+    """
+    target = arr[pivot]
+    lt, i, gt = st, st, end
+
+    while i <= gt:
+        val = arr[i]
+        if val < target:
+            arr[i], arr[lt] = arr[lt], val
+            lt += 1
+            i += 1
+        elif target < val:
+            arr[i], arr[gt] = arr[gt], val
+            gt -= 1
+        else:
+            i += 1
+
+    return lt, gt
+
+
+def _duplicate_ratio(arr, st, end):
+    """Estimate ratio of duplicated values in arr[st:end+1] by sampling."""
+    n = end - st + 1
+    step = max(1, n // _DUPLICATE_SAMPLES)
+    sample = sorted(arr[i] for i in range(st, end+1, step))
+
+    dups = sum(1 for a, b in zip(sample, sample[1:]) if not a < b)
+    return dups / len(sample)
+
+
+def _qsort(st, end, arr, three_way=None):
+    """Sort arr[st:end+1] in-place by introsort.
+
+    Partitions are handled with an explicit stack, always continuing
+    on the smaller side so that the stack depth stays O(log n).
+    Once the partition depth exceeds 2*log(n) the remaining range
+    is sorted by heapsort, and small ranges by insertion sort.
+
+    If `three_way` is None, three-way partitioning is chosen when
+    the sampled duplicate ratio is high.
+    """
+    if st >= end:
+        return
+
+    if three_way is None:
+        three_way = _duplicate_ratio(arr, st, end) >= _DUPLICATE_RATIO
+
+    stack = [(st, end, 2 * (end - st + 1).bit_length())]
+
+    while stack:
+        st, end, depth = stack.pop()
+
+        while end - st >= _INSERTION_CUTOFF:
+            if depth == 0:
+                _heapsort(arr, st, end)
+                break
+            depth -= 1
+
+            if three_way:
+                lt, gt = _partition3(arr, st, end, _choose_pivot(arr, st, end))
+            else:
+                lt = gt = _partition(arr, st, end)
+
+            # defer the larger side and keep working on the smaller one
+            if lt - st < end - gt:
+                stack.append((gt+1, end, depth))
+                end = lt - 1
+            else:
+                stack.append((st, lt-1, depth))
+                st = gt + 1
+        else:
+            _insertion_sort(arr, st, end)
+
+
+def _choose_algorithm(arr):
+    """Choose sorting algorithm by length and range of the values.
+
+    Returns:
+        name: str
+            one of 'counting', 'radix' or 'comparison'
+    """
+    n = len(arr)
+    if n < _DISPATCH_CUTOFF or not all(type(val) is int for val in arr):
+        return 'comparison'
+
+    span = max(arr) - min(arr)
+    if span <= _COUNTING_FACTOR * n:
+        return 'counting'
+    # each pass is a linear scan, compared to log(n) levels of partitions
+    if radix_passes(span) * 2 <= n.bit_length():
+        return 'radix'
+    return 'comparison'
+
+
+def quick_sort(arr: List[int], three_way: bool = None) -> None:
+    """In-place quick sort.
+
+    This is implemented as introsort, hence the worst case is O(n log n)
+    and it does not rely on recursion.
+
+    Lists of integers in a small range are dispatched to
+    counting sort or radix sort, which produce the same result.
+    The chosen path is logged at debug level.
+
+    Args:
+        arr: list or writable buffer
+            array to sort. Buffer objects of numeric values,
+            such as array.array or numpy.ndarray, are sorted
+            by the typed path without copying into a list.
+        three_way: bool
+            partition into `<`, `==` and `>` the pivot,
+            which is efficient for inputs with many duplicates.
+            If not set, this is chosen by sampling the input,
+            and non-comparison sorts may be used for integers.
+
+    Returns:
+        None
+    """
+    if is_buffer(arr):
+        _log.debug(f'quick_sort: typed (n={len(arr)})')
+        sort_buffer(arr)
+        return
+
+    algo = 'comparison' if three_way is not None else _choose_algorithm(arr)
+    _log.debug(f'quick_sort: {algo} (n={len(arr)})')
+
+    if algo == 'counting':
+        counting_sort(arr)
+    elif algo == 'radix':
+        radix_sort(arr)
+    else:
+        _qsort(0, len(arr)-1, arr, three_way)
+
+
+def argsort(arr):
+    """Return indices which sort the array.
+
+    Equal values keep the original order.
+
+    Args:
+        arr: list or buffer
+            target array, which is not modified
 
+    Returns:
+        indices: list if given list, otherwise numpy.ndarray
+            or memoryview of int64 if numpy is not available
+    """
+    if is_buffer(arr):
+        return argsort_buffer(arr)
 
-def quick_sort(arr: List[int]) -> None:
-    """In-place quick sort."""
-    _qsort(0, len(arr)-1, arr)
+    return sorted(range(len(arr)), key=arr.__getitem__)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#
+# Sorting for objects supporting the buffer protocol
+# such as array.array, bytearray, memoryview and numpy.ndarray.
+# The values are sorted in-place, without being copied into a list.
+
+import heapq
+import struct
+import itertools
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+
+# formats which can be handled by the typed kernel
+_NUMERIC_FORMATS = frozenset('bBhHiIlLqQfd')
+# number of items sorted at once by the typed kernel
+_CHUNK_SIZE = 1 << 16
+# approximate size of a boxed 64 bit value held in a list, including the pointer
+_BOXED_SIZE = 48
+
+
+def is_buffer(arr) -> bool:
+    """Check if the object supports the buffer protocol."""
+    if isinstance(arr, list):
+        return False
+    try:
+        memoryview(arr)
+    except TypeError:
+        return False
+    return True
+
+
+def _typed_view(arr) -> memoryview:
+    """Return writable, flat memoryview of homogeneous numeric values."""
+    view = memoryview(arr)
+
+    if view.readonly:
+        raise TypeError('Buffer must be writable')
+    if not view.c_contiguous:
+        raise ValueError('Buffer must be C-contiguous')
+
+    fmt = view.format.lstrip('@')
+    if fmt not in _NUMERIC_FORMATS:
+        raise TypeError(f'Unsupported buffer format: {view.format!r}')
+
+    if view.ndim != 1 or fmt != view.format:
+        view = view.cast('B').cast(fmt)
+
+    return view
+
+
+def typed_buffer(fmt: str, n: int) -> memoryview:
+    """Allocate zero-filled typed buffer of `n` items."""
+    return memoryview(bytearray(n * struct.calcsize(fmt))).cast(fmt)
+
+
+def _pack_into(view, st, values):
+    """Write values to view[st:st+len(values)]."""
+    fmt = view.format
+    view[st:st+len(values)].cast('B')[:] = struct.pack(f'{len(values)}{fmt}', *values)
+
+
+def _sort_memory(itemsize, n):
+    """Approximate peak memory of `_sort_chunked` on n values in bytes,
+    including the values themselves."""
+    chunk = min(n, _CHUNK_SIZE)
+    scratch = n * itemsize if n > _CHUNK_SIZE else 0
+    # boxed values, argument tuple and bytes of struct.pack
+    return n * itemsize + scratch + chunk * (_BOXED_SIZE + 8 + itemsize)
+
+
+def _sort_chunked(view):
+    """Sort typed values chunk by chunk and merge the sorted runs."""
+    n = len(view)
+
+    for st in range(0, n, _CHUNK_SIZE):
+        _pack_into(view, st, sorted(view[st:st+_CHUNK_SIZE]))
+
+    if n <= _CHUNK_SIZE:
+        return
+
+    runs = [view[st:st+_CHUNK_SIZE] for st in range(0, n, _CHUNK_SIZE)]
+    merged = typed_buffer(view.format, n)
+    it = heapq.merge(*runs)
+
+    for st in range(0, n, _CHUNK_SIZE):
+        _pack_into(merged, st, list(itertools.islice(it, _CHUNK_SIZE)))
+
+    view.cast('B')[:] = merged.cast('B')
+
+
+def sort_buffer(arr) -> None:
+    """In-place sort of buffer object.
+
+    If numpy is available, values are sorted by `numpy.sort`,
+    otherwise by typed kernel which sorts chunks and merges them.
+
+    Args:
+        arr: writable buffer of numeric values
+
+    Returns:
+        None
+    """
+    view = _typed_view(arr)
+
+    if _np is not None:
+        _np.asarray(view).sort()
+    else:
+        _sort_chunked(view)
+
+
+def argsort_buffer(arr):
+    """Return indices which sort buffer object.
+
+    Returns:
+        indices: numpy.ndarray if numpy is available,
+            otherwise memoryview of int64
+    """
+    view = _typed_view(arr)
+
+    if _np is not None:
+        return _np.argsort(_np.asarray(view), kind='stable')
+
+    indices = sorted(range(len(view)), key=view.__getitem__)
+    res = typed_buffer('q', len(indices))
+    for st in range(0, len(indices), _CHUNK_SIZE):
+        _pack_into(res, st, indices[st:st+_CHUNK_SIZE])
+    return res
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+#
+# Benchmark of sorting and selection over input distributions.
+#
+# Usage:
+#   $ python -m sort.bench --sizes 1e3 1e4 1e5 --output result.json
+#   $ python -m sort.bench --algorithms introsort sorted --distributions sorted killer
+#
+# Results are written in JSON, so that runs of different versions can be diffed.
+
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+import platform
+import tracemalloc
+
+from ._base import quick_sort, _choose_algorithm
+from .radix import radix_sort
+from .selection import UnorderedList
+
+
+def _random(n):
+    return [random.randint(0, n) for _ in range(n)]
+
+
+def _random_float(n):
+    return [random.random() for _ in range(n)]
+
+
+def _wide_range(n):
+    return [random.randint(0, 1 << 62) for _ in range(n)]
+
+
+def _sorted(n):
+    return list(range(n))
+
+
+def _reversed(n):
+    return list(range(n, 0, -1))
+
+
+def _organ_pipe(n):
+    return list(range(n // 2)) + list(range(n - n // 2, 0, -1))
+
+
+def _few_unique(n):
+    return [random.randint(0, 7) for _ in range(n)]
+
+
+def _killer(n):
+    """Median-of-3 killer sequence by Musser.
+
+    The sequence is defined for multiple of 4,
+    hence the remaining values are appended in order.
+    """
+    m = n - n % 4
+    k = m // 2
+    arr = [0] * m
+    for i in range(1, k+1):
+        if i % 2:
+            arr[i-1] = i
+            arr[i] = k + i
+        arr[k+i-1] = 2 * i
+    return arr + list(range(m+1, n+1))
+
+
+DISTRIBUTIONS = {
+    'random': _random,
+    'random_float': _random_float,
+    'wide_range': _wide_range,
+    'sorted': _sorted,
+    'reversed': _reversed,
+    'organ_pipe': _organ_pipe,
+    'few_unique': _few_unique,
+    'killer': _killer,
+}
+
+
+def _rank(n, k_ratio):
+    return min(n, max(1, int(n * k_ratio)))
+
+
+# name -> (prepare input, run on prepared input)
+# only the latter is timed
+ALGORITHMS = {
+    # integers in small range are dispatched to counting or radix sort,
+    # the chosen path is reported as `dispatch`
+    'quick_sort_dispatch': (list, quick_sort),
+    # comparison path only
+    'introsort': (list, lambda arr: quick_sort(arr, three_way=False)),
+    'introsort_3way': (list, lambda arr: quick_sort(arr, three_way=True)),
+    'radix_sort': (list, radix_sort),
+    'sorted': (list, sorted),
+    'kth_smallest': (
+        UnorderedList,
+        lambda arr, k: arr.kth_smallest(k),
+    ),
+    'top_k': (
+        UnorderedList,
+        lambda arr, k: arr.top_k(k, largest=False),
+    ),
+    'nsmallest': (
+        list,
+        lambda arr, k: heapq.nsmallest(k, arr),
+    ),
+}
+# algorithms which take the rank as the second argument
+_SELECTION = frozenset(['kth_smallest', 'top_k', 'nsmallest'])
+# algorithms which only sort integers, skipped on other distributions
+_INTEGER_ONLY = frozenset(['radix_sort'])
+_FLOAT_DISTRIBUTIONS = frozenset(['random_float'])
+
+
+def _percentile(values, p):
+    """Nearest-rank percentile."""
+    values = sorted(values)
+    return values[max(0, -(-len(values) * p // 100) - 1)]
+
+
+def run(algorithm, distribution, size, repeat=5, k_ratio=0.01, memory=False):
+    """Measure single algorithm on single distribution.
+
+    Returns:
+        result: dict
+            median and p95 elapsed time in seconds,
+            throughput in elements per second,
+            and peak memory in bytes if `memory` is True
+    """
+    prepare, func = ALGORITHMS[algorithm]
+    args = (_rank(size, k_ratio),) if algorithm in _SELECTION else ()
+    data = DISTRIBUTIONS[distribution](size)
+
+    times = []
+    for _ in range(repeat):
+        arr = prepare(data)
+        st = time.perf_counter()
+        func(arr, *args)
+        times.append(time.perf_counter() - st)
+
+    median = _percentile(times, 50)
+    result = {
+        'algorithm': algorithm,
+        'distribution': distribution,
+        'size': size,
+        'repeat': repeat,
+        'median': median,
+        'p95': _percentile(times, 95),
+        'throughput': size / median if median > 0 else None,
+    }
+    if algorithm == 'quick_sort_dispatch':
+        result['dispatch'] = _choose_algorithm(data)
+
+    if memory:
+        arr = prepare(data)
+        tracemalloc.start()
+        func(arr, *args)
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m sort.bench',
+        description='Benchmark sorting and selection algorithms.'
+    )
+    parser.add_argument('--sizes', nargs='+', type=float,
+                        default=[1e3, 1e4, 1e5],
+                        help='input sizes, up to 1e7 (default: 1e3 1e4 1e5)')
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS),
+                        default=list(ALGORITHMS))
+    parser.add_argument('--distributions', nargs='+', choices=list(DISTRIBUTIONS),
+                        default=list(DISTRIBUTIONS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--k-ratio', type=float, default=0.01,
+                        help='rank to query for selection as ratio of size')
+    parser.add_argument('--memory', action='store_true',
+                        help='track peak memory with tracemalloc')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='path to JSON file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    results = []
+
+    for size in map(int, args.sizes):
+        for distribution in args.distributions:
+            for algorithm in args.algorithms:
+                if algorithm in _INTEGER_ONLY and distribution in _FLOAT_DISTRIBUTIONS:
+                    continue
+                result = run(algorithm, distribution, size,
+                             args.repeat, args.k_ratio, args.memory)
+                results.append(result)
+                print(f'{algorithm:>14s} {distribution:>12s} {size:>10d} '
+                      f'median: {result["median"]:.6f}s '
+                      f'p95: {result["p95"]:.6f}s '
+                      f'throughput: {result["throughput"] or 0:.0f}/s',
+                      file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+#
+# External merge sort for files which do not fit in memory.
+# Input is split into sorted runs, which are spilled to temporary files,
+# then the runs are merged by k-way merge with a heap.
+
+import os
+import mmap
+import heapq
+import struct
+import logging
+import itertools
+import tempfile
+import time
+import collections
+
+from ._base import quick_sort
+from ._typed import typed_buffer, _pack_into, _sort_memory, _BOXED_SIZE
+
+
+_log = logging.getLogger(__name__)
+
+
+DEFAULT_MEMORY_LIMIT = 64 << 20
+
+# minimum number of values read from each run at once
+_MIN_BLOCK = 1024
+# approximate size of a line of text as str object
+_LINE_SIZE = 80
+# format of runs spilled from newline-delimited integer files
+_TEXT_FORMAT = 'q'
+
+
+SortStats = collections.namedtuple(
+    'SortStats', ['size', 'elapsed', 'runs', 'passes', 'throughput']
+)
+SortStats.__doc__ = """Result of external sort.
+
+size: bytes of input file
+elapsed: elapsed time in seconds
+runs: number of initial sorted runs
+passes: number of merge passes
+throughput: MB/s of input processed
+"""
+
+
+def _read_binary(fp, fmt, n_items):
+    """Yield typed buffers of at most `n_items` values."""
+    itemsize = struct.calcsize(fmt)
+    while True:
+        data = bytearray(n_items * itemsize)
+        size = fp.readinto(data)
+        if not size:
+            return
+        if size % itemsize:
+            raise ValueError(f'File size is not multiple of item size: {itemsize}')
+        yield memoryview(data)[:size].cast(fmt)
+
+
+def _read_text(fp, n_items):
+    """Yield typed buffers of at most `n_items` values from text lines."""
+    lines = (line for line in fp if line.strip())
+    while True:
+        buf = typed_buffer(_TEXT_FORMAT, n_items)
+        size = 0
+        for batch in iter(lambda: list(itertools.islice(lines, _MIN_BLOCK)), []):
+            _pack_into(buf, size, [int(line) for line in batch])
+            size += len(batch)
+            if size + _MIN_BLOCK > n_items:
+                break
+        if size == 0:
+            return
+        yield buf[:size]
+
+
+def _iter_run(path, fmt, block):
+    """Iterate over values in run file reading `block` values at once."""
+    if os.path.getsize(path) == 0:
+        return
+
+    itemsize = struct.calcsize(fmt)
+    with open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        for st in range(0, size, block * itemsize):
+            view = memoryview(mm)[st:st+block*itemsize]
+            values = view.cast(fmt).tolist()
+            view.release()
+            yield from values
+
+
+class _Writer(object):
+    """Buffered writer of values in binary or text."""
+
+    def __init__(self, fp, fmt, text, block):
+        self._fp = fp
+        self._fmt = fmt
+        self._text = text
+        self._block = block
+        self._buf = []
+
+    def write(self, values):
+        for val in values:
+            self._buf.append(val)
+            if len(self._buf) >= self._block:
+                self.flush()
+
+    def flush(self):
+        if not self._buf:
+            return
+        if self._text:
+            self._fp.write(''.join(f'{val}\n' for val in self._buf).encode())
+        else:
+            self._fp.write(struct.pack(f'{len(self._buf)}{self._fmt}', *self._buf))
+        self._buf.clear()
+
+
+def _merge(paths, out_path, fmt, text, block):
+    runs = [_iter_run(path, fmt, block) for path in paths]
+    with open(out_path, 'wb') as f:
+        writer = _Writer(f, fmt, text, block)
+        writer.write(heapq.merge(*runs))
+        writer.flush()
+
+
+def _chunk_items(memory_limit, itemsize, text):
+    """Largest number of values of which sorting fits in the memory limit."""
+    # lines and values being parsed
+    reserve = _MIN_BLOCK * (_LINE_SIZE + _BOXED_SIZE + 8 + itemsize) if text else 0
+
+    lo, hi = 0, memory_limit // itemsize
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _sort_memory(itemsize, mid) + reserve <= memory_limit:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _writer_size(itemsize, text):
+    """Approximate memory of writer per buffered value."""
+    if text:
+        # formatted line, joined and encoded copies
+        return 8 + 3 * _LINE_SIZE
+    # argument tuple and bytes of struct.pack
+    return 16 + itemsize
+
+
+def _block_size(memory_limit, n_runs, itemsize, text):
+    """Number of values read from each run at once while merging.
+
+    Each run holds a block of boxed values, one more while reading
+    the next block, and the writer buffers a block of values
+    which may outlive the blocks of runs.
+    """
+    return memory_limit // (_BOXED_SIZE * (n_runs + 2) + _writer_size(itemsize, text))
+
+
+def external_sort(input_path: str, output_path: str,
+                  memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                  dtype: str = 'q', tmpdir: str = None) -> SortStats:
+    """Sort values in file which may be larger than memory.
+
+    Each chunk fitting in `memory_limit` is sorted by `quick_sort`
+    and spilled to a temporary file as a sorted run.
+    The runs are merged by k-way merge reading memory-mapped blocks.
+    If there are too many runs to merge at once,
+    they are merged over multiple passes.
+
+    Args:
+        input_path: str
+            path to input file
+        output_path: str
+            path to output file, which is written in the same format as input
+        memory_limit: int
+            approximate upper bound of memory used for the values in bytes,
+            including buffers of sorting and merging
+        dtype: str
+            struct format of fixed-width binary values such as 'q', 'i' or 'd'.
+            If None, input is newline-delimited integers.
+        tmpdir: str
+            directory for sorted runs (default: system temporary directory)
+
+    Returns:
+        stats: SortStats
+
+    Exceptions:
+        ValueError: if memory limit is too small to sort and merge
+            blocks of values within it (about 512 KiB)
+    """
+    text = dtype is None
+    fmt = _TEXT_FORMAT if text else dtype
+    itemsize = struct.calcsize(fmt)
+
+    # a typed chunk and buffers of the sort kernel
+    n_items = _chunk_items(memory_limit, itemsize, text)
+    # runs merged at once so that each reads at least `_MIN_BLOCK` values
+    fan_in = 1
+    while _block_size(memory_limit, fan_in + 1, itemsize, True) >= _MIN_BLOCK:
+        fan_in += 1
+    if n_items < _MIN_BLOCK or fan_in < 2:
+        raise ValueError(f'Memory limit is too small: {memory_limit}')
+
+    start = time.perf_counter()
+    size = os.path.getsize(input_path)
+
+    with tempfile.TemporaryDirectory(dir=tmpdir) as workdir:
+        paths = []
+        mode = 'r' if text else 'rb'
+        with open(input_path, mode) as f:
+            chunks = _read_text(f, n_items) if text else _read_binary(f, fmt, n_items)
+            for chunk in chunks:
+                quick_sort(chunk)
+                path = os.path.join(workdir, f'run{len(paths)}')
+                with open(path, 'wb') as out:
+                    out.write(chunk.cast('B'))
+                paths.append(path)
+                chunk.release()
+
+        n_runs = len(paths)
+        passes = 0
+
+        while len(paths) > fan_in:
+            merged = []
+            block = _block_size(memory_limit, fan_in, itemsize, False)
+            for i in range(0, len(paths), fan_in):
+                path = os.path.join(workdir, f'pass{passes}-{len(merged)}')
+                _merge(paths[i:i+fan_in], path, fmt, False, block)
+                for p in paths[i:i+fan_in]:
+                    os.remove(p)
+                merged.append(path)
+            paths = merged
+            passes += 1
+
+        block = _block_size(memory_limit, len(paths), itemsize, text)
+        _merge(paths, output_path, fmt, text, block)
+        passes += 1
+
+    elapsed = time.perf_counter() - start
+    throughput = size / elapsed / 1e6 if elapsed > 0 else float('inf')
+    _log.info(f'Sorted {size} bytes in {elapsed:.3f}s ({throughput:.2f} MB/s), '
+              f'runs: {n_runs}, passes: {passes}')
+
+    return SortStats(size, elapsed, n_runs, passes, throughput)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+#
+# Parallel sample sort on multiple processes.
+# Values are shared with the workers through shared memory,
+# so that the payload is not pickled.
+
+import os
+import bisect
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from ._base import _qsort, quick_sort
+from ._typed import is_buffer, typed_buffer, _typed_view, _pack_into, _CHUNK_SIZE
+
+
+# inputs smaller than this are sorted on the current process
+DEFAULT_THRESHOLD = 1 << 16
+# number of samples per bucket to choose splitters
+_OVERSAMPLING = 32
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def _attach(name, fmt, n):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, shm.buf.cast('B').cast(fmt)[:n]
+
+
+def _count_block(name, fmt, n, st, end, splitters):
+    """Count values in view[st:end] for each bucket."""
+    shm, view = _attach(name, fmt, n)
+    try:
+        counts = [0] * (len(splitters) + 1)
+        for val in view[st:end]:
+            counts[bisect.bisect_left(splitters, val)] += 1
+        return counts
+    finally:
+        view.release()
+        shm.close()
+
+
+def _scatter_block(src, dst, fmt, n, st, end, splitters, offsets):
+    """Move values in src[st:end] to the buckets in dst."""
+    src_shm, src_view = _attach(src, fmt, n)
+    dst_shm, dst_view = _attach(dst, fmt, n)
+    try:
+        offsets = offsets[:]
+        for val in src_view[st:end]:
+            k = bisect.bisect_left(splitters, val)
+            dst_view[offsets[k]] = val
+            offsets[k] += 1
+    finally:
+        src_view.release()
+        dst_view.release()
+        src_shm.close()
+        dst_shm.close()
+
+
+def _sort_bucket(name, fmt, n, st, end):
+    """Sort view[st:end] in-place."""
+    shm, view = _attach(name, fmt, n)
+    try:
+        _qsort(st, end-1, view)
+    finally:
+        view.release()
+        shm.close()
+
+
+def _list_format(arr):
+    """Return typed format to store the list values, None if not possible."""
+    if all(type(val) is int for val in arr):
+        if _INT64_MIN <= min(arr) and max(arr) <= _INT64_MAX:
+            return 'q'
+    elif all(type(val) is float for val in arr):
+        return 'd'
+    return None
+
+
+def _choose_splitters(view, n_buckets):
+    n = len(view)
+    size = min(n, n_buckets * _OVERSAMPLING)
+    sample = sorted(view[i] for i in random.sample(range(n), size))
+
+    step = size / n_buckets
+    return [sample[int(step * i)] for i in range(1, n_buckets)]
+
+
+def _sample_sort(view, workers):
+    n = len(view)
+    fmt = view.format
+    nbytes = n * view.itemsize
+
+    splitters = _choose_splitters(view, workers)
+    blocks = [(n * i // workers, n * (i+1) // workers) for i in range(workers)]
+
+    src = shared_memory.SharedMemory(create=True, size=nbytes)
+    dst = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        src.buf[:nbytes] = view.cast('B')
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = list(executor.map(
+                _count_block,
+                *zip(*[(src.name, fmt, n, st, end, splitters) for st, end in blocks])
+            ))
+
+            # start positions of each block in each bucket
+            n_buckets = len(splitters) + 1
+            offsets = [[0] * n_buckets for _ in range(workers)]
+            bounds = [0]
+            pos = 0
+            for k in range(n_buckets):
+                for b in range(workers):
+                    offsets[b][k] = pos
+                    pos += counts[b][k]
+                bounds.append(pos)
+
+            list(executor.map(
+                _scatter_block,
+                *zip(*[(src.name, dst.name, fmt, n, st, end, splitters, offsets[b])
+                       for b, (st, end) in enumerate(blocks)])
+            ))
+
+            buckets = [(dst.name, fmt, n, st, end)
+                       for st, end in zip(bounds, bounds[1:]) if end - st > 1]
+            if buckets:
+                list(executor.map(_sort_bucket, *zip(*buckets)))
+
+        view.cast('B')[:] = dst.buf[:nbytes]
+    finally:
+        src.close()
+        dst.close()
+        src.unlink()
+        dst.unlink()
+
+
+def parallel_sort(arr, workers: int = None, threshold: int = DEFAULT_THRESHOLD) -> None:
+    """In-place parallel sample sort.
+
+    Splitters are chosen from random samples, then each worker counts
+    and scatters a block of values into the buckets,
+    and finally each bucket is sorted by the worker.
+
+    Args:
+        arr: list or writable buffer
+            array to sort. List must consist of int or float only,
+            otherwise it is sorted by `quick_sort` on the current process.
+        workers: int
+            number of processes (default: number of CPUs)
+        threshold: int
+            if the array is smaller than this, sort by `quick_sort`
+            on the current process
+
+    Returns:
+        None
+    """
+    workers = workers or os.cpu_count() or 1
+
+    if workers < 2 or len(arr) < max(threshold, 2):
+        quick_sort(arr)
+        return
+
+    if is_buffer(arr):
+        _sample_sort(_typed_view(arr), workers)
+        return
+
+    fmt = _list_format(arr)
+    if fmt is None:
+        quick_sort(arr)
+        return
+
+    n = len(arr)
+    buf = typed_buffer(fmt, n)
+    for st in range(0, n, _CHUNK_SIZE):
+        _pack_into(buf, st, arr[st:st+_CHUNK_SIZE])
+
+    _sample_sort(buf, workers)
+    arr[:] = buf.tolist()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+#
+# Streaming quantiles.
+# Both classes follow the same rank semantics as
+# `UnorderedList.kth_smallest`, that is, `quantile(q)` returns
+# k-th smallest value where k = max(1, ceil(q * n)).
+
+import math
+import heapq
+import random
+import struct
+
+
+def _rank(q, n):
+    if not 0 <= q <= 1:
+        raise ValueError('q must be in range [0, 1]')
+    if n == 0:
+        raise IndexError('No value has been added')
+    return max(1, math.ceil(q * n))
+
+
+class RunningQuantile(object):
+    """Exact running quantile by two heaps.
+
+    The lower max-heap holds the k smallest values and
+    the upper min-heap holds the rest, so that the quantile is
+    the top of the lower heap.
+    Each update takes O(log n) time, and all values are kept,
+    hence use `KLLSketch` for unbounded streams.
+
+    Values are numbers, which are serialized as float64.
+
+    Usage:
+        >>> m = RunningQuantile()
+        >>> m.update_many([1, 5, 4, 2, 7, 3, 6])
+        >>> m.quantile()
+        4
+    """
+    def __init__(self, q: float = 0.5):
+        _rank(q, 1)
+        self._q = q
+        # values are negated to be used as max-heap
+        self._lower = []
+        self._upper = []
+
+    @property
+    def q(self):
+        return self._q
+
+    def __len__(self):
+        return len(self._lower) + len(self._upper)
+
+    def update(self, val) -> None:
+        if self._lower and val <= -self._lower[0]:
+            heapq.heappush(self._lower, -val)
+        else:
+            heapq.heappush(self._upper, val)
+
+        k = _rank(self._q, self.__len__())
+        while len(self._lower) > k:
+            heapq.heappush(self._upper, -heapq.heappop(self._lower))
+        while len(self._lower) < k:
+            heapq.heappush(self._lower, -heapq.heappop(self._upper))
+
+    def update_many(self, values) -> None:
+        for val in values:
+            self.update(val)
+
+    def quantile(self, q: float = None):
+        """Return the quantile.
+
+        Args:
+            q: float
+                must be the same as the one given at initialization
+
+        Exceptions:
+            ValueError: if q is not the tracked quantile
+            IndexError: if no value has been added
+        """
+        if q is not None and q != self._q:
+            raise ValueError(f'Only quantile {self._q} is tracked')
+        if not self._lower:
+            raise IndexError('No value has been added')
+        return -self._lower[0]
+
+    def merge(self, other: 'RunningQuantile') -> None:
+        """Add all values from other object tracking the same quantile."""
+        if other.q != self._q:
+            raise ValueError('Quantiles to track must be the same')
+        self.update_many(-val for val in other._lower)
+        self.update_many(other._upper)
+
+    def to_bytes(self) -> bytes:
+        n = self.__len__()
+        values = [-val for val in self._lower] + self._upper
+        return struct.pack(f'<dQ{n}d', self._q, n, *values)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'RunningQuantile':
+        q, n = struct.unpack_from('<dQ', data)
+        cls = cls(q)
+        cls.update_many(struct.unpack_from(f'<{n}d', data, struct.calcsize('<dQ')))
+        return cls
+
+
+class KLLSketch(object):
+    """Mergeable approximate quantile sketch by KLL.
+
+    Values are kept in compactors, where values in level h has weight 2^h.
+    When the sketch is full, a compactor sorts its values and
+    promotes every other value to the next level.
+    Memory is O(k) and the rank error is O(n / k) with high probability.
+    While no compaction happens (n is small), the answer is exact.
+
+    Detail:
+    Karnin, Lang and Liberty, Optimal Quantile Approximation in Streams (2016)
+
+    Usage:
+        >>> s1, s2 = KLLSketch(), KLLSketch()
+        >>> s1.update_many(range(1, 501))
+        >>> s2.update_many(range(501, 1001))
+        >>> s1.merge(s2)
+        >>> s1.quantile(0.5)
+        500
+    """
+    _HEADER = '<IQI'
+    # ratio of capacities between neighboring levels
+    _C = 2 / 3
+
+    def __init__(self, k: int = 200, seed: int = None):
+        if k < 2:
+            raise ValueError('k must be larger than 1')
+        self._k = k
+        self._n = 0
+        self._size = 0
+        self._max_size = 0
+        self._compactors = []
+        self._rng = random.Random(seed)
+        self._grow()
+
+    @property
+    def k(self):
+        return self._k
+
+    def __len__(self):
+        """Number of values added to the sketch."""
+        return self._n
+
+    def _capacity(self, h):
+        depth = len(self._compactors) - h - 1
+        return math.ceil(self._C ** depth * self._k) + 1
+
+    def _grow(self):
+        self._compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self._compactors)))
+
+    def _compact(self, items):
+        items.sort()
+        # keep one value if the number of values is odd
+        rest = [items.pop()] if len(items) % 2 else []
+        promoted = items[self._rng.random() < 0.5::2]
+        items[:] = rest
+        return promoted
+
+    def _compress(self):
+        for h in range(len(self._compactors)):
+            if len(self._compactors[h]) >= self._capacity(h):
+                if h + 1 >= len(self._compactors):
+                    self._grow()
+                self._compactors[h+1].extend(self._compact(self._compactors[h]))
+                self._size = sum(len(c) for c in self._compactors)
+                if self._size < self._max_size:
+                    break
+
+    def update(self, val) -> None:
+        self._compactors[0].append(val)
+        self._n += 1
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def update_many(self, values) -> None:
+        for val in values:
+            self.update(val)
+
+    def quantile(self, q: float):
+        """Return approximate quantile.
+
+        Exceptions:
+            ValueError: if q is not in range [0, 1]
+            IndexError: if no value has been added
+        """
+        k = _rank(q, self._n)
+
+        items = sorted(
+            (val, 1 << h)
+            for h, compactor in enumerate(self._compactors)
+            for val in compactor
+        )
+
+        total = 0
+        for val, weight in items:
+            total += weight
+            if total >= k:
+                return val
+        return items[-1][0]
+
+    def merge(self, other: 'KLLSketch') -> None:
+        """Merge other sketch with the same k into this sketch."""
+        if other.k != self._k:
+            raise ValueError('k must be the same to merge sketches')
+
+        while len(self._compactors) < len(other._compactors):
+            self._grow()
+        for h, compactor in enumerate(other._compactors):
+            self._compactors[h].extend(compactor)
+
+        self._n += other._n
+        self._size = sum(len(c) for c in self._compactors)
+        while self._size >= self._max_size:
+            self._compress()
+
+    def to_bytes(self) -> bytes:
+        sizes = [len(c) for c in self._compactors]
+        values = [val for c in self._compactors for val in c]
+        return struct.pack(
+            f'{self._HEADER}{len(sizes)}I{len(values)}d',
+            self._k, self._n, len(sizes), *sizes, *values
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes, seed: int = None) -> 'KLLSketch':
+        k, n, height = struct.unpack_from(cls._HEADER, data)
+        offset = struct.calcsize(cls._HEADER)
+        sizes = struct.unpack_from(f'<{height}I', data, offset)
+        offset += struct.calcsize(f'<{height}I')
+        values = struct.unpack_from(f'<{sum(sizes)}d', data, offset)
+
+        cls = cls(k, seed)
+        while len(cls._compactors) < height:
+            cls._grow()
+
+        st = 0
+        for h, size in enumerate(sizes):
+            cls._compactors[h] = list(values[st:st+size])
+            st += size
+        cls._n = n
+        cls._size = len(values)
+        return cls
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+# Non-comparison sorts for integers.
+
+import itertools
+from typing import List
+
+
+# number of bits sorted in each pass of radix sort
+_RADIX_BITS = 8
+_RADIX_MASK = (1 << _RADIX_BITS) - 1
+
+
+def counting_sort(arr: List[int]) -> None:
+    """In-place counting sort.
+
+    This takes O(n + k) time and O(k) memory,
+    where k is the range of the values.
+
+    Args:
+        arr: list of int
+
+    Returns:
+        None
+    """
+    if len(arr) < 2:
+        return
+
+    lo = min(arr)
+    counts = [0] * (max(arr) - lo + 1)
+
+    for val in arr:
+        counts[val-lo] += 1
+
+    i = 0
+    for val, c in enumerate(counts, lo):
+        if c:
+            arr[i:i+c] = [val] * c
+            i += c
+
+
+def radix_passes(span: int) -> int:
+    """Number of byte-wide passes to sort values in range [0, span]."""
+    return max(1, (span.bit_length() + _RADIX_BITS - 1) // _RADIX_BITS)
+
+
+def radix_sort(arr: List[int]) -> None:
+    """In-place LSD radix sort with byte-wide passes.
+
+    Values are offset by the minimum, hence negative values are allowed.
+    This takes O(p * (n + 256)) time where p is number of bytes
+    of the range of the values.
+
+    Args:
+        arr: list of int
+
+    Returns:
+        None
+    """
+    if len(arr) < 2:
+        return
+
+    lo = min(arr)
+
+    for p in range(radix_passes(max(arr) - lo)):
+        shift = p * _RADIX_BITS
+        buckets = [[] for _ in range(_RADIX_MASK + 1)]
+
+        for val in arr:
+            buckets[((val - lo) >> shift) & _RADIX_MASK].append(val)
+
+        arr[:] = itertools.chain.from_iterable(buckets)
@@ -1,12 +1,70 @@
 #!/usr/bin/env python3
 
+import bisect
+import heapq
 import random
 
+from ._base import _partition3
+
+
+# use heap for top_k if k is smaller than this ratio of the length
+_TOP_K_HEAP_RATIO = 0.1
+# range must be halved within this number of random partitions
+_SHRINK_STEPS = 4
+
+
+def _mom_select(values, k):
+    """Return k-th smallest value (0-indexed) in worst-case linear time."""
+    while len(values) > 5:
+        medians = [sorted(values[i:i+5])[(min(5, len(values)-i)-1)//2]
+                   for i in range(0, len(values), 5)]
+        pivot = _mom_select(medians, (len(medians)-1) // 2)
+
+        lows = [val for val in values if val < pivot]
+        highs = [val for val in values if pivot < val]
+
+        if k < len(lows):
+            values = lows
+        elif k < len(values) - len(highs):
+            return pivot
+        else:
+            k -= len(values) - len(highs)
+            values = highs
+
+    return sorted(values)[k]
+
+
+def _median_of_medians(arr, l, r):
+    """Return index of pivot which splits arr[l:r+1] at least 30/70."""
+    medians = [sorted(arr[i:min(i+5, r+1)])[(min(5, r+1-i)-1)//2]
+               for i in range(l, r+1, 5)]
+    return arr.index(_mom_select(medians, (len(medians)-1) // 2), l, r+1)
+
+
+def _invalidate(method):
+    """Wrap list method to clear known pivots before modifying the list."""
+    def wrapper(self, *args, **kwargs):
+        self._pivots.clear()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
 
 class UnorderedList(list):
     """List with a feature to get k-th smallest value.
-    If send query to get k-th smallest value multiple times,
-    this will be no longer efficient.
+
+    Each query partitions the list in-place by introselect,
+    which uses random pivots and checks that the range is halved
+    every few partitions. Otherwise the next pivot is chosen by
+    median of medians, which removes at least 30% of the range,
+    hence the sizes of partitioned ranges decrease geometrically
+    and the worst case is O(n).
+    The ranges of pivots which are placed at the final positions are kept.
+    Following queries only partition the range between the nearest
+    known pivots, hence repeated queries are cheaper than the first one.
+    The known pivots are discarded when the list is modified.
 
     While processing to get k-th smallest value,
     list values are swapped in-place,
@@ -18,43 +76,186 @@ class UnorderedList(list):
         4
         >>> l.kth_smallest(6)
         6
+        >>> l.kth_smallest_many([1, 4, 7])
+        [1, 4, 7]
+        >>> l.top_k(2)
+        [7, 6]
         >>> random.shuffle(l)
         >>> l.kth_smallest(5)
         5
     """
-    def _partition(self, l, r):
-        idx = random.randint(l, r)
-        pivot = self[idx]
-        self[idx], self[r] = self[r], self[idx]
-        idx = r
-        r -= 1
-        i = l
-
-        while i <= r:
-            if self[i] > pivot:
-                self[i], self[r] = self[r], self[i]
-                r -= 1
-            elif self[i] < pivot:
-                self[i], self[l] = self[l], self[i]
-                l += 1
-                i += 1
-            else:
-                i += 1
-        self[idx], self[l] = self[l], self[idx]
-        return l
-
-    def _select(self, k):
-        l, r = 0, self.__len__() - 1
-        idx = 0
-        while True:
-            idx = self._partition(l, r)
-
-            if idx == k - 1:
-                return self[k-1]
-            elif idx < k - 1:
-                l = idx + 1
-            else:
-                r = idx - 1
+    def __init__(self, *args, **kwargs):
+        super(UnorderedList, self).__init__(*args, **kwargs)
+        # sorted ranges [lt, gt] of which values are at the final positions
+        self._pivots = []
+
+    __setitem__ = _invalidate(list.__setitem__)
+    __delitem__ = _invalidate(list.__delitem__)
+    __iadd__ = _invalidate(list.__iadd__)
+    __imul__ = _invalidate(list.__imul__)
+    append = _invalidate(list.append)
+    extend = _invalidate(list.extend)
+    insert = _invalidate(list.insert)
+    pop = _invalidate(list.pop)
+    remove = _invalidate(list.remove)
+    clear = _invalidate(list.clear)
+    sort = _invalidate(list.sort)
+    reverse = _invalidate(list.reverse)
+
+    def _partition(self, arr, l, r, worst_case=False):
+        """Three-way partition around random pivot,
+        or median of medians if `worst_case` is True.
+
+        Returns range [lt, gt] of values equal to the pivot.
+        """
+        if worst_case:
+            pivot = _median_of_medians(arr, l, r)
+        else:
+            pivot = random.randint(l, r)
+        return _partition3(arr, l, r, pivot)
+
+    def _gap(self, idx):
+        """Return range between the nearest known pivots around the index.
+
+        Returns None if the value at the index is already fixed.
+        """
+        pivots = self._pivots
+        i = bisect.bisect_right(pivots, (idx, len(self)))
+
+        if i and pivots[i-1][1] >= idx:
+            return None
+
+        lo = pivots[i-1][1] + 1 if i else 0
+        hi = pivots[i][0] - 1 if i < len(pivots) else len(self) - 1
+        return lo, hi
+
+    def _select(self, indices):
+        """Place values at given indices to their sorted positions."""
+        gaps = {}
+        for idx in sorted(set(indices)):
+            gap = self._gap(idx)
+            if gap is not None:
+                gaps.setdefault(gap, []).append(idx - gap[0])
+
+        for (lo, hi), targets in gaps.items():
+            # work on plain list to partition without invalidating pivots
+            buf = list.__getitem__(self, slice(lo, hi+1))
+            found = []
+            # size of range when the current window of partitions started
+            # and number of partitions since then
+            stack = [(0, hi-lo, targets, hi-lo+1, 0)]
+
+            while stack:
+                l, r, targets, size, steps = stack.pop()
+                worst_case = False
+                if steps == _SHRINK_STEPS:
+                    worst_case = 2 * (r - l + 1) > size
+                    size, steps = r - l + 1, 0
+
+                lt, gt = self._partition(buf, l, r, worst_case)
+                found.append((lo+lt, lo+gt))
+
+                left = targets[:bisect.bisect_left(targets, lt)]
+                right = targets[bisect.bisect_right(targets, gt):]
+                if left:
+                    stack.append((l, lt-1, left, size, steps+1))
+                if right:
+                    stack.append((gt+1, r, right, size, steps+1))
+
+            list.__setitem__(self, slice(lo, hi+1), buf)
+            for pivot in found:
+                bisect.insort(self._pivots, pivot)
+
+    def _fix(self, lo, hi):
+        """Mark values in range [lo, hi] as placed at the final positions."""
+        pivots = self._pivots
+        i = bisect.bisect_left(pivots, (lo, lo))
+        if i and pivots[i-1][1] >= lo:
+            i -= 1
+            lo = pivots[i][0]
+
+        j = i
+        while j < len(pivots) and pivots[j][0] <= hi + 1:
+            hi = max(hi, pivots[j][1])
+            j += 1
+
+        pivots[i:j] = [(lo, hi)]
+
+    def _validate(self, k):
+        if k < 1 or k > self.__len__():
+            raise IndexError(f'k must be in range [1, {self.__len__()}]')
 
     def kth_smallest(self, k):
-        return self._select(k)
+        """Return k-th smallest value (1-indexed)."""
+        self._validate(k)
+        self._select([k-1])
+        return self[k-1]
+
+    def kth_smallest_many(self, ks):
+        """Return k-th smallest values for each k in a single pass.
+
+        Args:
+            ks: list of int
+                ranks to query (1-indexed)
+
+        Returns:
+            values: list
+                k-th smallest values in the same order as `ks`
+        """
+        for k in ks:
+            self._validate(k)
+        self._select([k-1 for k in ks])
+        return [self[k-1] for k in ks]
+
+    def nth_element(self, k):
+        """Partition in-place around k-th smallest value (1-indexed).
+
+        After this, self[k-1] is k-th smallest value,
+        values before it are not greater, and values after it are not smaller.
+        """
+        self._validate(k)
+        self._select([k-1])
+
+    def partial_sort(self, k):
+        """Sort k smallest values in-place into self[:k].
+
+        Order of the rest of the values is not specified.
+        """
+        if k == 0:
+            return
+        self.nth_element(k)
+        list.__setitem__(self, slice(0, k), sorted(self[:k]))
+        self._fix(0, k-1)
+
+    def top_k(self, k, largest=True):
+        """Return k largest (or smallest) values.
+
+        If k is small, this uses heap without modifying the list,
+        otherwise, the list is partitioned in-place by selection.
+
+        Args:
+            k: int
+                number of values
+            largest: bool
+                return largest values if True, otherwise smallest
+
+        Returns:
+            values: list
+                sorted in descending order if `largest` is True,
+                otherwise in ascending order
+        """
+        n = self.__len__()
+        if k < 0 or k > n:
+            raise IndexError(f'k must be in range [0, {n}]')
+        if k == 0:
+            return []
+
+        if k < _TOP_K_HEAP_RATIO * n:
+            return heapq.nlargest(k, self) if largest else heapq.nsmallest(k, self)
+
+        if largest:
+            self.nth_element(n - k + 1)
+            return sorted(self[n-k:], reverse=True)
+
+        self.nth_element(k)
+        return sorted(self[:k])